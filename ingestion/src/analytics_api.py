@@ -0,0 +1,497 @@
+import sys
+import json
+import time
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import get_logger
+from hll import GROUPS, METRICS, estimate_distinct
+from search import ENTITIES, normalize_term, search
+
+logger = get_logger("ANALYTICS_API", log_filename="analytics.log")
+
+# ============================================================
+# 1. QUERY CATALOG (Fixed, parameterized reads over gold.*)
+# ============================================================
+# Params: name -> (default, min, max). All params are integers.
+# Date filters go through date_id so idx_fact_events_date is used.
+SINCE_DATE_ID = "TO_CHAR(CURRENT_DATE - %(days)s, 'YYYYMMDD')::INT"
+
+QUERY_CATALOG: Dict[str, Dict[str, Any]] = {
+    "top_repos": {
+        "description": "Most active repositories over the last N days",
+        "params": {"days": (7, 1, 365), "limit": (10, 1, 100)},
+        "sql": f"""
+            SELECT r.repo_name, r.repo_owner,
+                   COUNT(*)                   AS total_events,
+                   COUNT(DISTINCT f.actor_id) AS contributors
+            FROM gold.fact_events f
+            JOIN gold.dim_repos r ON f.repo_id = r.repo_id
+            WHERE f.date_id >= {SINCE_DATE_ID}
+              AND f.repo_id != -1
+            GROUP BY r.repo_name, r.repo_owner
+            ORDER BY total_events DESC
+            LIMIT %(limit)s;
+        """,
+    },
+    "top_actors": {
+        "description": "Most active users over the last N days",
+        "params": {"days": (7, 1, 365), "limit": (10, 1, 100)},
+        "sql": f"""
+            SELECT a.actor_login, COUNT(*) AS total_events
+            FROM gold.fact_events f
+            JOIN gold.dim_actors a ON f.actor_id = a.actor_id
+            WHERE f.date_id >= {SINCE_DATE_ID}
+              AND f.actor_id != -1
+            GROUP BY a.actor_login
+            ORDER BY total_events DESC
+            LIMIT %(limit)s;
+        """,
+    },
+    "events_per_category_per_day": {
+        "description": "Event counts per category per day over the last N days",
+        "params": {"days": (7, 1, 365)},
+        "sql": f"""
+            SELECT d.full_date, t.event_category, COUNT(*) AS events
+            FROM gold.fact_events f
+            JOIN gold.dim_date d        ON f.date_id = d.date_id
+            JOIN gold.dim_event_types t ON f.event_type = t.event_type
+            WHERE f.date_id >= {SINCE_DATE_ID}
+            GROUP BY d.full_date, t.event_category
+            ORDER BY d.full_date, t.event_category;
+        """,
+    },
+    "active_actors": {
+        "description": "Unique active users over the last N days",
+        "params": {"days": (1, 1, 365)},
+        "sql": f"""
+            SELECT COUNT(DISTINCT actor_id) AS active_actors
+            FROM gold.fact_events
+            WHERE date_id >= {SINCE_DATE_ID}
+              AND actor_id != -1;
+        """,
+    },
+    "daily_volume": {
+        "description": "Daily events, unique users and unique repos over the last N days",
+        "params": {"days": (7, 1, 365)},
+        "sql": f"""
+            SELECT d.full_date,
+                   COUNT(*)                   AS total_events,
+                   COUNT(DISTINCT f.actor_id) AS unique_users,
+                   COUNT(DISTINCT f.repo_id)  AS unique_repos
+            FROM gold.fact_events f
+            JOIN gold.dim_date d ON f.date_id = d.date_id
+            WHERE f.date_id >= {SINCE_DATE_ID}
+            GROUP BY d.full_date
+            ORDER BY d.full_date;
+        """,
+    },
+}
+
+# Facts + sketches: the sketches are updated after the Gold commit, in their own transaction
+WATERMARK_QUERY = """
+    SELECT
+        (SELECT MAX(silver_processed_at) FROM gold.fact_events),
+        (SELECT max_watermark FROM meta.table_stats WHERE table_name = 'gold.agg_distinct_sketches');
+"""
+
+
+def parse_params(query_name: str, raw_params: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Validates request parameters against the catalog.
+    Raises ValueError for unknown or out-of-range parameters.
+    """
+    spec = QUERY_CATALOG[query_name]["params"]
+
+    unknown = set(raw_params) - set(spec)
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+
+    params = {}
+    for name, (default, low, high) in spec.items():
+        value = raw_params.get(name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter '{name}' must be an integer")
+        if not low <= value <= high:
+            raise ValueError(f"Parameter '{name}' must be between {low} and {high}")
+        params[name] = value
+    return params
+
+
+def parse_distinct_params(raw_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validates /distinct parameters (sketch estimates, see hll.py).
+    Raises ValueError for unknown or invalid parameters.
+    """
+    unknown = set(raw_params) - {"metric", "days", "group", "category", "event_type"}
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+
+    params = {
+        "metric": raw_params.get("metric", "actor"),
+        "group": raw_params.get("group", "total"),
+        "category": raw_params.get("category") or None,
+        "event_type": raw_params.get("event_type") or None,
+    }
+    if params["metric"] not in METRICS:
+        raise ValueError(f"Parameter 'metric' must be one of: {', '.join(sorted(METRICS))}")
+    if params["group"] not in GROUPS:
+        raise ValueError(f"Parameter 'group' must be one of: {', '.join(GROUPS)}")
+    for name in ("category", "event_type"):
+        if params[name] is not None and len(params[name]) > 50:
+            raise ValueError(f"Parameter '{name}' is too long")
+
+    try:
+        params["days"] = int(raw_params.get("days", 7))
+    except (TypeError, ValueError):
+        raise ValueError("Parameter 'days' must be an integer")
+    if not 1 <= params["days"] <= 365:
+        raise ValueError("Parameter 'days' must be between 1 and 365")
+    return params
+
+
+def parse_search_params(raw_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validates /search parameters.
+    Raises ValueError for unknown or invalid parameters.
+    """
+    unknown = set(raw_params) - {"q", "entity", "limit"}
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+
+    entity = raw_params.get("entity", "all")
+    if entity != "all" and entity not in ENTITIES:
+        raise ValueError(f"Parameter 'entity' must be one of: all, {', '.join(ENTITIES)}")
+    try:
+        limit = int(raw_params.get("limit", 10))
+    except (TypeError, ValueError):
+        raise ValueError("Parameter 'limit' must be an integer")
+    if not 1 <= limit <= 50:
+        raise ValueError("Parameter 'limit' must be between 1 and 50")
+
+    # Normalized before caching: 'Linux ' and 'linux' share one entry
+    return {"term": normalize_term(raw_params.get("q", "")), "entity": entity, "limit": limit}
+
+# ============================================================
+# 2. TTL + LRU CACHE
+# ============================================================
+class TTLCache:
+    """
+    Thread-safe in-process cache.
+    - Entries expire after `ttl_seconds`
+    - Least recently used entry is evicted once `max_entries` is reached
+    - clear() starts a new generation: results computed before it are not stored
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+
+    def get(self, key: Tuple, count: bool = True) -> Tuple[bool, Any]:
+        """Returns (hit, value). count=False skips the hit/miss counters (re-checks)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                if count:
+                    self.misses += 1
+                return False, None
+
+            self._data.move_to_end(key)
+            if count:
+                self.hits += 1
+            return True, entry[1]
+
+    def put(self, key: Tuple, value: Any, generation: int = None):
+        """Stores value, unless it was computed under a generation that clear() has since ended."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# ============================================================
+# 3. SERVICE (Catalog + Cache + Watermark Invalidation)
+# ============================================================
+class AnalyticsService:
+    """
+    Runs catalog queries through the cache.
+    The cache is dropped whenever the gold.fact_events or the sketch watermark moves,
+    i.e. as soon as a Gold run has committed new facts or new distinct-count sketches.
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(Config.ANALYTICS_CACHE_SIZE, Config.ANALYTICS_CACHE_TTL)
+        # minconn = maxconn: psycopg2 closes returned connections beyond minconn, so a smaller
+        # minconn would reconnect to Postgres on most concurrent cache misses
+        self.pool = ThreadedConnectionPool(Config.ANALYTICS_DB_POOL_SIZE, Config.ANALYTICS_DB_POOL_SIZE,
+                                           **Config.get_db_auth())
+        # getconn() raises PoolError when the pool is empty: request threads queue here instead
+        self._connection_slots = threading.BoundedSemaphore(Config.ANALYTICS_DB_POOL_SIZE)
+        self.per_query: Dict[str, Dict[str, int]] = {
+            name: {"hits": 0, "misses": 0} for name in list(QUERY_CATALOG) + ["distinct", "search"]
+        }
+        self.invalidations = 0
+        self._watermark = None
+        self._watermarks: Tuple = None   # (facts, sketches) at the last check
+        self._watermark_checked_at = 0.0
+        self._lock = threading.Lock()
+        # One lock per in-flight cache miss: concurrent misses for the same tile hit Postgres once
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+
+    def _with_cursor(self, func: Callable, *args, **kwargs):
+        """Runs func(cursor, ...) on a pooled read-only connection (waits for a free one)."""
+        with self._connection_slots:
+            conn = self.pool.getconn()
+            try:
+                if not conn.autocommit:
+                    conn.set_session(readonly=True, autocommit=True)
+                with conn.cursor() as cursor:
+                    return func(cursor, *args, **kwargs)
+            finally:
+                self.pool.putconn(conn)
+
+    def _execute(self, sql: str, params: Any = None) -> Tuple[list, list]:
+        def fetch(cursor):
+            cursor.execute(sql, params)
+            columns = [col.name for col in cursor.description]
+            return columns, cursor.fetchall()
+
+        return self._with_cursor(fetch)
+
+    def _refresh_watermark(self):
+        """Checks the fact + sketch watermarks at most every ANALYTICS_WATERMARK_CHECK_SECONDS."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._watermark_checked_at < Config.ANALYTICS_WATERMARK_CHECK_SECONDS:
+                return
+            self._watermark_checked_at = now
+
+        # Backward scan on idx_fact_events_watermark + one meta.table_stats row
+        _, rows = self._execute(WATERMARK_QUERY)
+        watermarks = tuple(rows[0])
+
+        with self._lock:
+            if watermarks != self._watermarks:
+                if self._watermarks is not None:
+                    self.cache.clear()
+                    self.invalidations += 1
+                    logger.info(f" Watermark moved to {watermarks[0]} (sketches: {watermarks[1]}). Cache invalidated.")
+                self._watermarks = watermarks
+                self._watermark = watermarks[0]
+
+    def _cached(self, name: str, params: Dict[str, Any], compute: Callable[[], list]) -> Tuple[bool, list]:
+        """Cache lookup; on a miss runs compute() once per key, even under concurrent requests."""
+        key = (name, tuple(sorted(params.items())))
+
+        self._refresh_watermark()
+
+        hit, result = self.cache.get(key)
+        if not hit:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+            with key_lock:
+                try:
+                    # Another thread may have filled it while we waited
+                    hit, result = self.cache.get(key, count=False)
+                    if not hit:
+                        # Captured first: if the watermark moves mid-query, the result is not cached
+                        generation = self.cache.generation
+                        start = time.time()
+                        result = compute()
+                        self.cache.put(key, result, generation)
+                        logger.info(f" {name} {params}: {len(result)} rows in {(time.time() - start) * 1000:.0f} ms")
+                finally:
+                    # Waiters already hold the lock object; later misses start a fresh one
+                    with self._lock:
+                        if self._key_locks.get(key) is key_lock:
+                            del self._key_locks[key]
+
+        with self._lock:
+            self.per_query[name]["hits" if hit else "misses"] += 1
+        return hit, result
+
+    def run_query(self, query_name: str, raw_params: Dict[str, Any]) -> Dict[str, Any]:
+        params = parse_params(query_name, raw_params)
+
+        def compute():
+            columns, rows = self._execute(QUERY_CATALOG[query_name]["sql"], params)
+            return [dict(zip(columns, row)) for row in rows]
+
+        hit, result = self._cached(query_name, params, compute)
+        return {
+            "query": query_name,
+            "params": params,
+            "cached": hit,
+            "watermark": self._watermark,
+            "rows": result,
+        }
+
+    def run_distinct(self, raw_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Approximate distinct actors/repos from the HLL sketches (no fact scan)."""
+        params = parse_distinct_params(raw_params)
+
+        def compute():
+            return self._with_cursor(estimate_distinct, **params)
+
+        hit, result = self._cached("distinct", params, compute)
+        return {
+            "query": "distinct",
+            "params": params,
+            "cached": hit,
+            "watermark": self._watermark,
+            "rows": result,
+        }
+
+    def run_search(self, raw_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Ranked repo/actor matches (trigram + prefix indexes, see search.py)."""
+        params = parse_search_params(raw_params)
+
+        def compute():
+            return self._with_cursor(search, params["term"], params["entity"], params["limit"])
+
+        hit, result = self._cached("search", params, compute)
+        return {
+            "query": "search",
+            "params": params,
+            "cached": hit,
+            "watermark": self._watermark,
+            "rows": result,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_query = {
+                name: dict(counts, hit_rate=round(counts["hits"] / (counts["hits"] + counts["misses"]), 4)
+                           if counts["hits"] + counts["misses"] else 0.0)
+                for name, counts in self.per_query.items()
+            }
+            return {
+                "cache": self.cache.stats(),
+                "invalidations": self.invalidations,
+                "watermark": self._watermark,
+                "queries": per_query,
+            }
+
+# ============================================================
+# 4. HTTP ENDPOINT
+# ============================================================
+# GET /catalog                    -> available queries + params
+# GET /query/<name>?days=7&...    -> query result
+# GET /distinct?metric=actor&days=30&group=day&category=...  -> HLL estimates
+# GET /search?q=torvalds&entity=all&limit=10                  -> ranked repo/actor matches
+# GET /stats                      -> cache hit rates
+class AnalyticsHandler(BaseHTTPRequestHandler):
+    service: AnalyticsService = None
+
+    def _send_json(self, status: int, body: Any):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+
+        try:
+            if parts == ["catalog"]:
+                self._send_json(200, {
+                    name: {"description": q["description"], "params": q["params"]}
+                    for name, q in QUERY_CATALOG.items()
+                })
+            elif parts == ["stats"]:
+                self._send_json(200, self.service.stats())
+            elif parts == ["distinct"]:
+                raw_params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                self._send_json(200, self.service.run_distinct(raw_params))
+            elif parts == ["search"]:
+                raw_params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                self._send_json(200, self.service.run_search(raw_params))
+            elif len(parts) == 2 and parts[0] == "query" and parts[1] not in QUERY_CATALOG:
+                self._send_json(404, {"error": f"Unknown query: {parts[1]}"})
+            elif len(parts) == 2 and parts[0] == "query":
+                raw_params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                self._send_json(200, self.service.run_query(parts[1], raw_params))
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except psycopg2.Error as db_err:
+            logger.error(f" DATABASE ERROR: {db_err}")
+            self._send_json(500, {"error": "Database error"})
+
+    def log_message(self, format, *args):
+        # Route http.server access logs through our logger instead of stderr
+        logger.debug(format % args)
+
+
+def serve():
+    """Starts the analytics HTTP endpoint (blocking)."""
+    AnalyticsHandler.service = AnalyticsService()
+    server = ThreadingHTTPServer((Config.ANALYTICS_HOST, Config.ANALYTICS_PORT), AnalyticsHandler)
+
+    logger.info(f" Analytics API listening on http://{Config.ANALYTICS_HOST}:{Config.ANALYTICS_PORT}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info(" Shutdown signal received.")
+    finally:
+        server.server_close()
+        AnalyticsHandler.service.pool.closeall()
+        logger.info(" Analytics API stopped.")
+
+# Run directly:
+#   python ingestion/src/analytics_api.py          -> serves the API
+#   python ingestion/src/analytics_api.py --check  -> every route has its service method (no DB needed)
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        for method in ("run_query", "run_distinct", "run_search", "stats"):
+            assert callable(getattr(AnalyticsService, method, None)), f"AnalyticsService.{method} missing"
+        print("Routes OK")
+    else:
+        serve()
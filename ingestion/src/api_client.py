@@ -8,17 +8,29 @@ sys.path.append(str(current_dir))
 
 from config import Config
 from logger import get_logger
+from profiler import stage
 
 # Initialize Logger
 logger = get_logger("API_CLIENT")
 
-def fetch_events() -> List[Dict[str, Any]]:
-    """
-    Fetches the latest public events from GitHub.
-    
-    Returns:
-        List[Dict]: A list of dictionary objects containing event data.
-    """
+# Rate limit / polling headers of the most recent response (read by the poll scheduler)
+last_response_meta: Dict[str, Any] = {}
+
+def parse_rate_headers(headers) -> Dict[str, Any]:
+    """Extracts X-RateLimit-Limit, -Remaining, -Reset and X-Poll-Interval (None if absent)."""
+    def _number(name):
+        value = headers.get(name)
+        return int(value) if value and value.isdigit() else None
+
+    return {
+        "limit": _number("X-RateLimit-Limit"),
+        "remaining": _number("X-RateLimit-Remaining"),
+        "reset_at": _number("X-RateLimit-Reset"),
+        "poll_interval": _number("X-Poll-Interval"),
+    }
+
+def build_headers() -> Dict[str, str]:
+    """Standard GitHub API headers (shared with the feed poller)."""
     headers = {
         "Accept": "application/vnd.github+json",
         "User-Agent": "python-data-pipeline-v1",
@@ -28,21 +40,34 @@ def fetch_events() -> List[Dict[str, Any]]:
     if Config.GITHUB_TOKEN:
         headers["Authorization"] = f"Bearer {Config.GITHUB_TOKEN}"
 
+    return headers
+
+def fetch_events() -> List[Dict[str, Any]]:
+    """
+    Fetches the latest public events from GitHub.
+    
+    Returns:
+        List[Dict]: A list of dictionary objects containing event data.
+    """
+    headers = build_headers()
+
     try:
         # Fetch up to 100 events
         params = {"per_page": 100}
         
         logger.info(f"Fetching events from {Config.GITHUB_URL}...")
-        response = requests.get(
-            Config.GITHUB_URL, 
-            headers=headers, 
-            params=params, 
-            timeout=10
-        )
+        with stage("http.fetch"):
+            response = requests.get(
+                Config.GITHUB_URL, 
+                headers=headers, 
+                params=params, 
+                timeout=10
+            )
         
         # We check the headers to see what our limit is
         rate_limit = response.headers.get("X-RateLimit-Limit")
         rate_remaining = response.headers.get("X-RateLimit-Remaining")
+        last_response_meta.update(parse_rate_headers(response.headers))
         
         if rate_limit:
             if int(rate_limit) == 60:
@@ -56,7 +81,8 @@ def fetch_events() -> List[Dict[str, Any]]:
         # Raise error for 4xx or 5xx status codes
         response.raise_for_status()
         
-        data = response.json()
+        with stage("json.decode"):
+            data = response.json()
 
         logger.info(f" Successfully fetched {len(data)} events.")
         return data
@@ -1,6 +1,7 @@
 import sys
 import json
 import psycopg2
+from psycopg2.extras import execute_values
 from pathlib import Path
 from typing import List, Dict, Any
 
@@ -10,17 +11,22 @@ sys.path.append(str(current_dir))
 
 from config import Config
 from logger import get_logger
+from profiler import stage
+from table_stats import add_row_count
 
 logger = get_logger("BRONZE_LOADER", log_filename="bronze.log")
 
-def load_to_bronze(events: List[Dict[str, Any]]):
+def load_to_bronze(events: List[Dict[str, Any]]) -> Dict[str, int]:
     """
     Inserts raw events into the Bronze layer.
     Handles duplicates via 'ON CONFLICT DO NOTHING'.
+
+    Returns:
+        Dict[str, int]: The batch report (inserted / duplicates / errors).
     """
     if not events:
         logger.info(" No events to load.")
-        return
+        return {"inserted": 0, "duplicates": 0, "errors": 0}
 
     # 1. The Insert Query
     # We dump the whole JSON object into 'full_json'
@@ -40,24 +46,29 @@ def load_to_bronze(events: List[Dict[str, Any]]):
     conn = None
     try:
         # Connect to DB using our secure Config
-        with psycopg2.connect(**Config.get_db_auth()) as conn:
+        with stage("db.connect"):
+            conn = psycopg2.connect(**Config.get_db_auth())
+        with conn:
             with conn.cursor() as cursor:
                 
                 success_count = 0
                 duplicate_count = 0
                 error_count = 0
+                dlq_count = 0
 
                 for event in events:
                     try:
                         # Extract basic info
                         e_id = event.get("id")
                         e_type = event.get("type")
-                        e_json = json.dumps(event) 
+                        with stage("json.encode"):
+                            e_json = json.dumps(event) 
 
                         # Execute the safe insert
-                        cursor.execute("SAVEPOINT row_save")
-                        cursor.execute(insert_query, (e_id, e_type, e_json))
-                        cursor.execute("RELEASE SAVEPOINT row_save")
+                        with stage("db.execute"):
+                            cursor.execute("SAVEPOINT row_save")
+                            cursor.execute(insert_query, (e_id, e_type, e_json))
+                            cursor.execute("RELEASE SAVEPOINT row_save")
        
                         
                        
@@ -72,16 +83,25 @@ def load_to_bronze(events: List[Dict[str, Any]]):
                         error_count += 1
                         logger.error(f"Row Error: {row_error}")
                         
-                        # Send to DLQ
+                        # Send to DLQ (part of the batch: one commit keeps meta.table_stats exact)
                         try:
+                            cursor.execute("SAVEPOINT dlq_save")
                             cursor.execute(dlq_query, (json.dumps(event), str(row_error)))
-                            conn.commit()
+                            cursor.execute("RELEASE SAVEPOINT dlq_save")
+                            dlq_count += 1
                         except Exception as e:
+                           cursor.execute("ROLLBACK TO SAVEPOINT dlq_save")
                            logger.critical(f"DLQ Failed: {e}")
 
+                # Maintained counts (meta.table_stats) commit with the batch
+                add_row_count(cursor, "bronze.raw_events", success_count)
+                add_row_count(cursor, "bronze.dead_letter_queue", dlq_count)
+
                 # Commit the batch of successful inserts
-                conn.commit()
+                with stage("db.commit"):
+                    conn.commit()
                 logger.info(f" Batch Report: {success_count} Inserted | {duplicate_count} Duplicates | {error_count} Errors")
+                return {"inserted": success_count, "duplicates": duplicate_count, "errors": error_count}
 
     except Exception as e:
         logger.error(f" Critical Database Connection Error: {e}")
@@ -89,6 +109,50 @@ def load_to_bronze(events: List[Dict[str, Any]]):
     finally:
         if conn: conn.close()
 
+BULK_INSERT = """
+    INSERT INTO bronze.raw_events (event_id, event_type, full_json)
+    VALUES %s
+    ON CONFLICT (event_id) DO NOTHING
+    RETURNING 1;
+"""
+
+def bulk_load_to_bronze(events: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Set-based insert for large batches (used by the spool drainer).
+    - One multi-row INSERT per 1000 events instead of one statement + savepoint per row
+    - If any row is rejected, the batch is rolled back and re-sent through
+      load_to_bronze() so only the bad rows end up in the DLQ
+    - Connection errors are raised so the caller can retry later
+    """
+    if not events:
+        return {"inserted": 0, "duplicates": 0, "errors": 0}
+
+    with stage("json.encode"):
+        rows = [(event.get("id"), event.get("type"), json.dumps(event)) for event in events]
+
+    with stage("db.connect"):
+        conn = psycopg2.connect(**Config.get_db_auth())
+    try:
+        with conn.cursor() as cursor:
+            with stage("db.execute"):
+                inserted = len(execute_values(cursor, BULK_INSERT, rows, page_size=1000, fetch=True))
+            add_row_count(cursor, "bronze.raw_events", inserted)
+        with stage("db.commit"):
+            conn.commit()
+
+    except psycopg2.OperationalError:
+        raise
+    except psycopg2.Error as e:
+        conn.rollback()
+        logger.warning(f" Bulk insert rejected ({e}). Falling back to row-level load.")
+        return load_to_bronze(events)
+    finally:
+        conn.close()
+
+    report = {"inserted": inserted, "duplicates": len(rows) - inserted, "errors": 0}
+    logger.info(f" Bulk Report: {report['inserted']} Inserted | {report['duplicates']} Duplicates")
+    return report
+
 # --- INTEGRATION TEST BLOCK ---
 if __name__ == "__main__":
     # When you run this file directly, it will import the API client
@@ -1,5 +1,7 @@
 import os
 import sys
+import socket
+from pathlib import Path
 from dotenv import load_dotenv
 from typing import Dict
 
@@ -24,6 +26,53 @@ class Config:
     GITHUB_URL: str = "https://api.github.com/events"
     GITHUB_TOKEN: str | None = os.getenv("GITHUB_TOKEN") # EXPECT KEY OR NONE
 
+    # Watchlist Polling: comma separated "org:<org>", "repo:<owner>/<repo>", "user:<login>", "events"
+    # Empty = only the global firehose (GITHUB_URL)
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_WATCHLIST: str = os.getenv("GITHUB_WATCHLIST", "")
+    POLL_WORKERS: int = int(os.getenv("POLL_WORKERS", "16"))
+    RATE_LIMIT_RESERVE: int = int(os.getenv("RATE_LIMIT_RESERVE", "100"))  # Requests we never spend
+
+    # Adaptive Poll Scheduler (seconds)
+    POLL_MIN_INTERVAL: float = float(os.getenv("POLL_MIN_INTERVAL", "10"))
+    POLL_MAX_INTERVAL: float = float(os.getenv("POLL_MAX_INTERVAL", "300"))
+    POLL_INITIAL_INTERVAL: float = float(os.getenv("POLL_INITIAL_INTERVAL", "60"))
+
+    # Write-Ahead Spool: fetched batches hit local disk first, a background drainer loads Bronze
+    SPOOL_ENABLED: bool = os.getenv("SPOOL_ENABLED", "true").lower() == "true"
+    SPOOL_DIR: Path = Path(os.getenv("SPOOL_DIR", Path(__file__).resolve().parent.parent / "spool"))
+    SPOOL_SEGMENT_BYTES: int = int(os.getenv("SPOOL_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+    SPOOL_MAX_BYTES: int = int(os.getenv("SPOOL_MAX_BYTES", str(1024 * 1024 * 1024)))
+    SPOOL_COMPRESS: bool = os.getenv("SPOOL_COMPRESS", "true").lower() == "true"
+    SPOOL_FSYNC_EVERY: int = int(os.getenv("SPOOL_FSYNC_EVERY", "8"))          # records
+    SPOOL_FSYNC_SECONDS: float = float(os.getenv("SPOOL_FSYNC_SECONDS", "1.0"))
+    SPOOL_SEGMENT_MAX_AGE: float = float(os.getenv("SPOOL_SEGMENT_MAX_AGE", "30"))  # seconds before a quiet segment is sealed
+    SPOOL_DRAIN_BATCH: int = int(os.getenv("SPOOL_DRAIN_BATCH", "10000"))       # events per bulk insert
+
+    # Query Profiling (opt-in): EXPLAIN ANALYZE every Silver/Gold step into meta.query_profiles
+    PROFILE_QUERIES: bool = os.getenv("PROFILE_QUERIES", "false").lower() == "true"
+    PROFILE_REGRESSION_FACTOR: float = float(os.getenv("PROFILE_REGRESSION_FACTOR", "2.0"))
+    PROFILE_HISTORY_RUNS: int = int(os.getenv("PROFILE_HISTORY_RUNS", "20"))
+
+    # Hot-path Profiling (opt-in, also via --profile): per-stage timers, cProfile + sampled stacks for N runs
+    PIPELINE_PROFILE: bool = os.getenv("PIPELINE_PROFILE", "false").lower() == "true"
+    PIPELINE_PROFILE_RUNS: int = int(os.getenv("PIPELINE_PROFILE_RUNS", "0"))
+    PIPELINE_PROFILE_SAMPLE_MS: float = float(os.getenv("PIPELINE_PROFILE_SAMPLE_MS", "5"))
+
+    # HyperLogLog sketches (gold.agg_distinct_sketches), updated after every Gold run
+    DISTINCT_SKETCHES_ENABLED: bool = os.getenv("DISTINCT_SKETCHES_ENABLED", "true").lower() == "true"
+
+    # Analytics API (cached reads over gold.*)
+    ANALYTICS_HOST: str = os.getenv("ANALYTICS_HOST", "127.0.0.1")
+    ANALYTICS_PORT: int = int(os.getenv("ANALYTICS_PORT", "8080"))
+    ANALYTICS_CACHE_TTL: float = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+    ANALYTICS_CACHE_SIZE: int = int(os.getenv("ANALYTICS_CACHE_SIZE", "256"))
+    ANALYTICS_WATERMARK_CHECK_SECONDS: float = float(os.getenv("ANALYTICS_WATERMARK_CHECK_SECONDS", "5"))
+    ANALYTICS_DB_POOL_SIZE: int = int(os.getenv("ANALYTICS_DB_POOL_SIZE", "4"))
+
+    # Multi-worker: shows up as application_name in pg_stat_activity (who holds the Gold lease)
+    WORKER_ID: str = os.getenv("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+
     @classmethod #USING CLASS DECORATOR FOR SPECIFYING WE USE CLASS VERIABLES AS INPUTS
     def validate(cls):
         """
@@ -52,7 +101,8 @@ class Config:
             "database": Config.DB_NAME,
             "user": Config.DB_USER,
             "password": Config.DB_PASS,
-            "port": Config.DB_PORT
+            "port": Config.DB_PORT,
+            "application_name": f"github-pipeline:{Config.WORKER_ID}"
         }
 
 # --- TEST BLOCK (Run this file to check your .env) ---
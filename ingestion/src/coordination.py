@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+from typing import Optional
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import get_logger
+
+logger = get_logger("COORDINATION")
+
+# ============================================================
+# 1. LOCK KEYS
+# ============================================================
+# Two-key advisory locks: pg_locks shows them as classid = namespace, objid = key
+LOCK_NAMESPACE = 0x4748      # "GH" - keeps our keys apart from other apps on the same DB
+GOLD_LEASE = 1               # Session lock: the one worker allowed to run Gold
+SILVER_GOLD_FENCE = 2        # Xact lock: Silver batches shared, Gold exclusive
+
+# ============================================================
+# 2. GOLD LEASE (Exactly one Gold worker)
+# ============================================================
+def try_acquire_gold_lease(cursor) -> bool:
+    """
+    Non-blocking. The lease is a session-level advisory lock, so it is tied to the
+    connection: a crashed or partitioned worker loses it as soon as Postgres drops
+    the connection - no heartbeat table, no stale lease to expire.
+    """
+    cursor.execute("SELECT pg_try_advisory_lock(%s, %s);", (LOCK_NAMESPACE, GOLD_LEASE))
+    return cursor.fetchone()[0]
+
+
+def release_gold_lease(cursor):
+    cursor.execute("SELECT pg_advisory_unlock(%s, %s);", (LOCK_NAMESPACE, GOLD_LEASE))
+
+
+def gold_lease_holder(cursor) -> Optional[str]:
+    """application_name of the worker holding the Gold lease (None = free)."""
+    cursor.execute("""
+        SELECT a.application_name
+        FROM pg_locks l
+        JOIN pg_stat_activity a ON a.pid = l.pid
+        WHERE l.locktype = 'advisory'
+          AND l.classid = %s AND l.objid = %s AND l.objsubid = 2
+          AND l.granted;
+    """, (LOCK_NAMESPACE, GOLD_LEASE))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+# ============================================================
+# 3. SILVER -> GOLD FENCE (Watermark safety)
+# ============================================================
+# silver.events.processed_at is set when the batch inserts, but becomes visible only at COMMIT.
+# With several Silver workers, a batch that inserted earlier can commit after Gold
+# has already moved its watermark past that time - those rows would never reach Gold.
+# The fence closes that window:
+#   - every Silver batch takes the fence SHARED as its first statement
+#   - Silver stamps processed_at with statement_timestamp() of its INSERT, i.e. after the fence
+#     (not CURRENT_TIMESTAMP: psycopg2 sends BEGIN before the lock, so that is older)
+#   - Gold takes it EXCLUSIVE before reading the watermark
+# Gold therefore waits for in-flight batches, and any batch that gets the fence after
+# Gold commits gets a processed_at later than everything Gold could see.
+def enter_silver_batch(cursor):
+    """First statement of every Silver batch transaction (released at COMMIT/ROLLBACK)."""
+    cursor.execute("SELECT pg_advisory_xact_lock_shared(%s, %s);", (LOCK_NAMESPACE, SILVER_GOLD_FENCE))
+
+
+def fence_silver_batches(cursor):
+    """Gold: blocks until in-flight Silver batches commit, holds new ones until Gold commits."""
+    cursor.execute("SELECT pg_advisory_xact_lock(%s, %s);", (LOCK_NAMESPACE, SILVER_GOLD_FENCE))
+
+# --- TEST BLOCK ---
+# Run directly: python ingestion/src/coordination.py  -> shows who holds the Gold lease
+if __name__ == "__main__":
+    import psycopg2
+
+    print("--- STARTING TEST ---")
+    print(f"This worker: {Config.WORKER_ID}")
+    with psycopg2.connect(**Config.get_db_auth()) as conn:
+        with conn.cursor() as cursor:
+            print(f"Gold lease holder: {gold_lease_holder(cursor) or 'nobody'}")
+            if try_acquire_gold_lease(cursor):
+                print("Lease acquired (free) - releasing again.")
+                release_gold_lease(cursor)
+            else:
+                print("Lease held by another worker.")
+    conn.close()
+    print("--- END TEST ---")
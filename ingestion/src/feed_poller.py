@@ -0,0 +1,338 @@
+import sys
+import time
+import heapq
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import get_logger
+from api_client import build_headers
+from profiler import stage
+
+logger = get_logger("FEED_POLLER")
+
+# How many event ids we remember per feed (the API returns at most 100 per page)
+SEEN_IDS_PER_FEED = 300
+
+# Weight of the latest poll in the activity average
+ACTIVITY_ALPHA = 0.3
+
+# ============================================================
+# 1. WATCHLIST
+# ============================================================
+FEED_PATHS = {
+    "org": "/orgs/{}/events",
+    "repo": "/repos/{}/events",
+    "user": "/users/{}/events",
+}
+
+def parse_watchlist(spec: str) -> List["Feed"]:
+    """
+    Turns the GITHUB_WATCHLIST string into Feed objects.
+
+    Example:
+        "org:apache, repo:psf/requests, user:torvalds, events"
+    """
+    feeds = []
+    for entry in (e.strip() for e in spec.split(",")):
+        if not entry:
+            continue
+
+        if entry == "events":
+            feeds.append(Feed("events", Config.GITHUB_URL))
+            continue
+
+        kind, _, target = entry.partition(":")
+        if kind not in FEED_PATHS or not target:
+            raise ValueError(f"Invalid watchlist entry: '{entry}' (expected org:, repo:, user: or events)")
+
+        feeds.append(Feed(entry, Config.GITHUB_API_URL + FEED_PATHS[kind].format(target)))
+
+    # Same feed listed twice would just burn quota
+    unique = {feed.url: feed for feed in feeds}
+    return list(unique.values())
+
+
+class Feed:
+    """
+    Polling state for one events endpoint (ETag, cadence, activity, recently seen ids).
+
+    Seen ids and the ETag of a response only become part of the state after commit(),
+    i.e. once Bronze (or the spool) has stored the events. After rollback() the next
+    poll fetches the same page again instead of answering 304 / filtering it out.
+    """
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.etag: Optional[str] = None
+        self.poll_interval = 60          # GitHub's X-Poll-Interval for this feed
+        self.last_polled = 0.0
+        self.activity = 1.0              # Moving average of new events per poll
+        self.seen_ids: deque = deque(maxlen=SEEN_IDS_PER_FEED)
+        self._seen_set: set = set()
+        self.failures = 0
+        self.last_overlap = 0            # Events in the last response we had already seen
+        self.last_gap = False            # Last response shared nothing with the previous one
+        self._pending_ids: List[str] = []
+        self._pending_etag: Optional[str] = None
+
+    def is_due(self, now: float) -> bool:
+        # Back off exponentially on repeated failures (max 32x)
+        backoff = 2 ** min(self.failures, 5)
+        # Small slack so a feed polled late in the last cycle is not skipped this cycle
+        return now - self.last_polled >= self.poll_interval * backoff - 5
+
+    def priority(self, now: float) -> float:
+        """Busy feeds first; quiet feeds still win once they have been waiting long enough."""
+        if self.last_polled == 0:
+            return float("inf")
+        staleness = (now - self.last_polled) / self.poll_interval
+        return (self.activity + 0.1) * staleness
+
+    def filter_new(self, events: List[Dict[str, Any]], etag: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Returns only the events this feed has not delivered before (remembered on commit())."""
+        polled_before = bool(self.seen_ids)
+        new_events = [event for event in events if event.get("id") not in self._seen_set]
+        self._pending_ids = [event.get("id") for event in new_events]
+        self._pending_etag = etag
+
+        self.last_overlap = len(events) - len(new_events)
+        # No overlap with what we already had -> events between the two polls were probably missed
+        self.last_gap = polled_before and bool(events) and self.last_overlap == 0
+
+        self.activity = ACTIVITY_ALPHA * len(new_events) + (1 - ACTIVITY_ALPHA) * self.activity
+        return new_events
+
+    def commit(self):
+        """The last filter_new() batch is stored: remember its ids and ETag."""
+        for event_id in self._pending_ids:
+            if event_id in self._seen_set:
+                continue
+            if len(self.seen_ids) == self.seen_ids.maxlen:
+                self._seen_set.discard(self.seen_ids[0])
+            self.seen_ids.append(event_id)
+            self._seen_set.add(event_id)
+        if self._pending_etag:
+            self.etag = self._pending_etag
+        self.rollback()
+
+    def rollback(self):
+        """The last filter_new() batch was not stored: forget it, the next poll fetches it again."""
+        self._pending_ids = []
+        self._pending_etag = None
+
+    def remember(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """filter_new() + commit(), for events that are already stored."""
+        new_events = self.filter_new(events)
+        self.commit()
+        return new_events
+
+# ============================================================
+# 2. SHARED RATE LIMIT BUDGET
+# ============================================================
+class RateLimitBudget:
+    """
+    One budget for all feeds (GitHub limits per token, not per endpoint).
+    Spends the remaining quota evenly until the reset time.
+    """
+
+    def __init__(self, reserve: int):
+        self.reserve = reserve
+        self.limit = 5000 if Config.GITHUB_TOKEN else 60
+        self.remaining = self.limit
+        self.reset_at = time.time() + 3600
+        self._lock = threading.Lock()
+
+    def update(self, headers) -> None:
+        with self._lock:
+            if headers.get("X-RateLimit-Limit"):
+                self.limit = int(headers["X-RateLimit-Limit"])
+            if headers.get("X-RateLimit-Remaining"):
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if headers.get("X-RateLimit-Reset"):
+                self.reset_at = float(headers["X-RateLimit-Reset"])
+
+    def exhaust(self) -> None:
+        with self._lock:
+            self.remaining = 0
+
+    def allowance(self, cycle_seconds: float, now: Optional[float] = None) -> int:
+        """How many requests this cycle may spend."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if now >= self.reset_at:
+                # Window rolled over but we have not seen fresh headers yet
+                self.remaining = self.limit
+                self.reset_at = now + 3600
+
+            # Never reserve more than 10% (an unauthenticated limit is only 60/hour)
+            spendable = max(0, self.remaining - min(self.reserve, self.limit // 10))
+            cycles_left = max(1.0, (self.reset_at - now) / cycle_seconds)
+            return int(spendable / cycles_left) if spendable >= cycles_left else min(spendable, 1)
+
+# ============================================================
+# 3. POLLER
+# ============================================================
+class FeedPoller:
+    """
+    Polls many event feeds concurrently and merges them into one batch.
+    - Per-feed ETag (304 Not Modified does not count against the rate limit)
+    - Shared budget, spent on the busiest / most overdue feeds first
+    - Cross-feed de-duplication (an org feed and a repo feed overlap)
+    - Two-phase: commit_cycle() once the batch is stored, rollback_cycle() if storing failed
+    """
+
+    def __init__(self, feeds: List[Feed], workers: int = Config.POLL_WORKERS):
+        self.feeds = feeds
+        self.budget = RateLimitBudget(Config.RATE_LIMIT_RESERVE)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed")
+
+        # Keep-alive connections for every worker thread
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(build_headers())
+
+        # Overlap report of the last cycle (feeds the adaptive poll scheduler)
+        self.last_report: Dict[str, int] = {"inserted": 0, "duplicates": 0, "gaps": 0}
+        self.last_polled_count = 0
+        self._uncommitted: List[Feed] = []
+
+    @classmethod
+    def from_config(cls) -> "FeedPoller":
+        feeds = parse_watchlist(Config.GITHUB_WATCHLIST)
+        logger.info(f" Watchlist: {len(feeds)} feeds | {Config.POLL_WORKERS} workers")
+        return cls(feeds)
+
+    def select_feeds(self, cycle_seconds: float, now: Optional[float] = None) -> List[Feed]:
+        """Picks the feeds to poll this cycle within the rate limit budget."""
+        now = time.time() if now is None else now
+        due = [feed for feed in self.feeds if feed.is_due(now)]
+        allowance = self.budget.allowance(cycle_seconds, now)
+
+        if len(due) > allowance:
+            logger.info(f" Budget allows {allowance}/{len(due)} due feeds this cycle.")
+            return heapq.nlargest(allowance, due, key=lambda f: f.priority(now))
+        return due
+
+    def poll_feed(self, feed: Feed) -> List[Dict[str, Any]]:
+        headers = {"If-None-Match": feed.etag} if feed.etag else {}
+        feed.last_polled = time.time()
+        feed.last_overlap, feed.last_gap = 0, False
+
+        try:
+            with stage("http.fetch"):
+                response = self.session.get(feed.url, headers=headers, params={"per_page": 100}, timeout=10)
+            self.budget.update(response.headers)
+
+            if response.headers.get("X-Poll-Interval"):
+                feed.poll_interval = int(response.headers["X-Poll-Interval"])
+
+            if response.status_code == 304:
+                feed.failures = 0
+                feed.filter_new([])
+                return []
+
+            if response.status_code in (403, 429) and response.headers.get("X-RateLimit-Remaining") == "0":
+                logger.error(" Rate Limit Exceeded! Pausing all feeds until reset.")
+                self.budget.exhaust()
+                return []
+
+            response.raise_for_status()
+
+            feed.failures = 0
+            with stage("json.decode"):
+                events = response.json()
+            return feed.filter_new(events, response.headers.get("ETag"))
+
+        except Exception as e:
+            feed.failures += 1
+            logger.error(f" Feed {feed.name} failed ({feed.failures}x): {e}")
+            return []
+
+    def poll_cycle(self, cycle_seconds: float = 60) -> List[Dict[str, Any]]:
+        """
+        Polls every selected feed in parallel.
+
+        Returns:
+            List[Dict]: New events from all feeds, de-duplicated by event id.
+        """
+        # A previous cycle that was never committed was not stored: fetch it again
+        self.rollback_cycle()
+
+        selected = self.select_feeds(cycle_seconds)
+        self._uncommitted = selected
+        self.last_polled_count = len(selected)
+        self.last_report = {"inserted": 0, "duplicates": 0, "gaps": 0}
+        if not selected:
+            return []
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for events in self.executor.map(self.poll_feed, selected):
+            for event in events:
+                merged.setdefault(event.get("id"), event)
+
+        # Overlap is measured per feed: cross-feed copies are not a sign of over-polling
+        self.last_report = {
+            "inserted": len(merged),
+            "duplicates": sum(feed.last_overlap for feed in selected),
+            "gaps": sum(1 for feed in selected if feed.last_gap),
+        }
+
+        logger.info(
+            f" Polled {len(selected)}/{len(self.feeds)} feeds -> {len(merged)} new events"
+            f" | Rate Limit Remaining: {self.budget.remaining}"
+        )
+        return list(merged.values())
+
+    def commit_cycle(self):
+        """Call once the last poll_cycle() batch is stored (Bronze or spool)."""
+        for feed in self._uncommitted:
+            feed.commit()
+        self._uncommitted = []
+
+    def rollback_cycle(self):
+        """Call when storing the last poll_cycle() batch failed: its events are fetched again."""
+        for feed in self._uncommitted:
+            feed.rollback()
+        self._uncommitted = []
+
+    def rate_meta(self) -> Dict[str, Any]:
+        """Shared budget + the strictest X-Poll-Interval, in the api_client.parse_rate_headers() shape."""
+        return {
+            "limit": self.budget.limit,
+            "remaining": self.budget.remaining,
+            "reset_at": self.budget.reset_at,
+            "poll_interval": min((feed.poll_interval for feed in self.feeds), default=None),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+# --- TEST BLOCK ---
+# Run directly: GITHUB_WATCHLIST="org:python,repo:psf/requests" python ingestion/src/feed_poller.py
+if __name__ == "__main__":
+    print("--- STARTING TEST ---")
+    if not Config.GITHUB_WATCHLIST:
+        print("GITHUB_WATCHLIST is empty - nothing to poll.")
+    else:
+        poller = FeedPoller.from_config()
+        events = poller.poll_cycle()
+        poller.commit_cycle()
+        for feed in poller.feeds:
+            print(f"{feed.name:<40} etag={'yes' if feed.etag else 'no':<4} activity={feed.activity:.1f}")
+        print(f"Merged events: {len(events)}")
+        poller.close()
+    print("--- END TEST ---")
@@ -0,0 +1,357 @@
+import sys
+import math
+import zlib
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import get_logger
+from table_stats import add_row_count
+
+logger = get_logger("HLL_SKETCHES")
+
+# ============================================================
+# 1. HYPERLOGLOG (Pure Python - no DB needed)
+# ============================================================
+# Precision 14 -> 16384 one-byte registers, standard error 1.04 / sqrt(16384) = 0.81%.
+# Every stored sketch uses the same precision, otherwise they could not be merged.
+HLL_PRECISION = 14
+SKETCH_VERSION = 1
+
+# 2^-r for every possible register value (r <= 64 - p + 1)
+_INV_POW2 = [2.0 ** -r for r in range(66)]
+
+
+def _hash64(value: Any) -> int:
+    """Stable 64-bit hash (Python's hash() is salted per process - useless for stored sketches)."""
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch.
+    - add(): O(1), idempotent (adding the same value twice changes nothing)
+    - merge(): register-wise max = sketch of the union of both inputs
+    - estimate(): within +-2 standard errors (+-1.6%) in ~95% of cases
+    """
+
+    __slots__ = ("p", "m", "registers")
+
+    def __init__(self, p: int = HLL_PRECISION, registers: Optional[bytearray] = None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = registers if registers is not None else bytearray(self.m)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, value: Any):
+        x = _hash64(value)
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        # Position of the first 1-bit in the remaining 64-p bits
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[Any]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog"):
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge sketches of precision {self.p} and {other.p}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    @classmethod
+    def union(cls, sketches: List["HyperLogLog"]) -> "HyperLogLog":
+        """Merges any number of sketches in one pass."""
+        if not sketches:
+            return cls()
+        if len({s.p for s in sketches}) > 1:
+            raise ValueError("Cannot merge sketches of different precision")
+        if len(sketches) == 1:
+            return cls(sketches[0].p, bytearray(sketches[0].registers))
+        return cls(sketches[0].p, bytearray(map(max, *(s.registers for s in sketches))))
+
+    def estimate(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(map(_INV_POW2.__getitem__, self.registers))
+
+        # Small cardinalities: linear counting on the empty registers is more accurate
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        # 64-bit hashes: no large-range correction needed
+        return raw
+
+    # --- Serialization: [version][precision][zlib(registers)] ---
+    # Sparse sketches (a quiet event type on one day) compress to a few hundred bytes.
+    def to_bytes(self) -> bytes:
+        return bytes([SKETCH_VERSION, self.p]) + zlib.compress(bytes(self.registers), 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        data = bytes(data)
+        if data[0] != SKETCH_VERSION:
+            raise ValueError(f"Unknown sketch version: {data[0]}")
+        return cls(data[1], bytearray(zlib.decompress(data[2:])))
+
+# ============================================================
+# 2. INCREMENTAL UPDATE (Runs after every Gold commit)
+# ============================================================
+SKETCH_TABLE = "gold.agg_distinct_sketches"
+
+# metric -> fact column (-1 sentinels are never counted)
+METRICS = {"actor": "actor_id", "repo": "repo_id"}
+
+# Ordered by day: only one day's sketches (event types x metrics x 16 KB) are held in memory,
+# even on the first run after a backfill
+FETCH_NEW_FACTS = """
+    SELECT date_id, event_type, actor_id, repo_id, silver_processed_at
+    FROM gold.fact_events
+    WHERE silver_processed_at > %s
+    ORDER BY date_id;
+"""
+
+UPSERT_SKETCHES = """
+    INSERT INTO gold.agg_distinct_sketches (date_id, event_type, metric, sketch)
+    VALUES %s
+    ON CONFLICT (date_id, event_type, metric) DO UPDATE SET
+        sketch = EXCLUDED.sketch,
+        updated_at = CURRENT_TIMESTAMP;
+"""
+
+
+def _write_day(cursor, date_id: int, sketches: Dict[tuple, HyperLogLog]) -> int:
+    """Folds the stored sketches of one day into the new ones and upserts them. Returns sketches created."""
+    cursor.execute(
+        "SELECT event_type, metric, sketch FROM gold.agg_distinct_sketches WHERE date_id = %s;",
+        (date_id,)
+    )
+    existing = 0
+    for event_type, metric, data in cursor.fetchall():
+        sketch = sketches.get((event_type, metric))
+        if sketch is not None:
+            sketch.merge(HyperLogLog.from_bytes(data))
+            existing += 1
+
+    rows = [(date_id, t, metric, psycopg2.Binary(s.to_bytes())) for (t, metric), s in sketches.items()]
+    execute_values(cursor, UPSERT_SKETCHES, rows, page_size=500)
+    return len(sketches) - existing
+
+
+def update_distinct_sketches(conn) -> Dict[str, Any]:
+    """
+    Adds facts loaded since the last update to the per day x event type sketches.
+
+    The sketch watermark lives in meta.table_stats ('gold.agg_distinct_sketches').
+    Its row is locked first, so two updaters run one after the other. The new
+    sketches (written one day at a time), the row count and the watermark are committed together.
+    Re-adding a fact is harmless (HLL is idempotent), so a retry never double-counts.
+
+    Returns:
+        dict: facts read, sketches written, sketches created, new watermark.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT max_watermark FROM meta.table_stats WHERE table_name = %s FOR UPDATE;",
+            (SKETCH_TABLE,)
+        )
+        row = cursor.fetchone()
+        watermark = (row[0] if row else None) or datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    # Server-side cursor: the first run after a backfill streams the whole fact table
+    day_sketches: Dict[tuple, HyperLogLog] = {}
+    current_day = None
+    facts, written, created, new_watermark = 0, 0, 0, None
+    with conn.cursor() as cursor, conn.cursor(name="hll_new_facts") as stream:
+        stream.itersize = 10000
+        stream.execute(FETCH_NEW_FACTS, (watermark,))
+        for date_id, event_type, actor_id, repo_id, processed_at in stream:
+            if date_id != current_day:
+                if day_sketches:
+                    created += _write_day(cursor, current_day, day_sketches)
+                    written += len(day_sketches)
+                    day_sketches = {}
+                current_day = date_id
+
+            facts += 1
+            if new_watermark is None or processed_at > new_watermark:
+                new_watermark = processed_at
+            for metric, value in (("actor", actor_id), ("repo", repo_id)):
+                if value != -1:
+                    key = (event_type, metric)
+                    sketch = day_sketches.get(key)
+                    if sketch is None:
+                        sketch = day_sketches[key] = HyperLogLog()
+                    sketch.add(value)
+
+        if day_sketches:
+            created += _write_day(cursor, current_day, day_sketches)
+            written += len(day_sketches)
+
+    if new_watermark is None:
+        conn.rollback()
+        return {"facts": facts, "sketches": 0, "created": 0, "watermark": watermark}
+
+    with conn.cursor() as cursor:
+        # Also advances past facts with only sentinel (-1) actors/repos, so they are not re-read
+        add_row_count(cursor, SKETCH_TABLE, created, new_watermark)
+    conn.commit()
+
+    return {"facts": facts, "sketches": written, "created": created, "watermark": new_watermark}
+
+# ============================================================
+# 3. ESTIMATES (Merge stored sketches, never touch the facts)
+# ============================================================
+GROUPS = ("total", "day", "category", "event_type")
+
+FETCH_SKETCHES = """
+    SELECT s.date_id, s.event_type, t.event_category, s.sketch
+    FROM gold.agg_distinct_sketches s
+    JOIN gold.dim_event_types t ON t.event_type = s.event_type
+    WHERE s.metric = %(metric)s
+      AND s.date_id >= TO_CHAR(CURRENT_DATE - %(days)s, 'YYYYMMDD')::INT
+      AND (%(category)s IS NULL OR t.event_category = %(category)s)
+      AND (%(event_type)s IS NULL OR s.event_type = %(event_type)s);
+"""
+
+
+def estimate_distinct(cursor, metric: str = "actor", days: int = 7, group: str = "total",
+                      category: Optional[str] = None, event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Approximate distinct actors / repos over the last N days.
+
+    Args:
+        group (str): 'total' (one row), 'day', 'category' or 'event_type'.
+
+    Returns:
+        list: one dict per group with the estimate and its ~95% bounds (+-2 standard errors).
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    if group not in GROUPS:
+        raise ValueError(f"Unknown group: {group}")
+
+    cursor.execute(FETCH_SKETCHES, {"metric": metric, "days": days, "category": category, "event_type": event_type})
+
+    grouped: Dict[Any, List[HyperLogLog]] = {}
+    for date_id, row_type, row_category, data in cursor.fetchall():
+        key = {"total": "total", "day": date_id, "category": row_category, "event_type": row_type}[group]
+        grouped.setdefault(key, []).append(HyperLogLog.from_bytes(data))
+
+    results = []
+    for key in sorted(grouped, key=str):
+        merged = HyperLogLog.union(grouped[key])
+        estimate = merged.estimate()
+        margin = 2 * merged.standard_error * estimate
+        results.append({
+            group: key,
+            f"distinct_{metric}s": round(estimate),
+            "low": round(estimate - margin),
+            "high": round(estimate + margin),
+            "sketches_merged": len(grouped[key]),
+        })
+    return results
+
+# ============================================================
+# 4. CHECKER (Sketch estimates vs exact COUNT(DISTINCT))
+# ============================================================
+EXACT_PER_DAY_CATEGORY = """
+    SELECT f.date_id, t.event_category, COUNT(DISTINCT f.{column})
+    FROM gold.fact_events f
+    JOIN gold.dim_event_types t ON t.event_type = f.event_type
+    WHERE f.date_id >= TO_CHAR(CURRENT_DATE - %s, 'YYYYMMDD')::INT
+      AND f.{column} != -1
+    GROUP BY f.date_id, t.event_category;
+"""
+
+
+def check_against_exact(days: int = 7, metric: str = "actor") -> float:
+    """
+    Compares every day x category estimate with the exact count (expensive - run by hand).
+    Returns the worst relative error; logs rows outside 3 standard errors.
+    """
+    sigma = HyperLogLog().standard_error
+    worst = 0.0
+    with psycopg2.connect(**Config.get_db_auth()) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(EXACT_PER_DAY_CATEGORY.format(column=METRICS[metric]), (days,))
+            exact = {(d, c): n for d, c, n in cursor.fetchall()}
+
+            cursor.execute(FETCH_SKETCHES, {"metric": metric, "days": days, "category": None, "event_type": None})
+            grouped: Dict[tuple, List[HyperLogLog]] = {}
+            for date_id, _, category, data in cursor.fetchall():
+                grouped.setdefault((date_id, category), []).append(HyperLogLog.from_bytes(data))
+    conn.close()
+
+    for key in sorted(set(exact) | set(grouped), key=str):
+        true_count = exact.get(key, 0)
+        estimate = HyperLogLog.union(grouped.get(key, [])).estimate()
+        error = abs(estimate - true_count) / true_count if true_count else float(estimate > 0)
+        worst = max(worst, error)
+        status = "OK" if error <= 3 * sigma else "OUTSIDE 3 SIGMA"
+        logger.info(f"   {key[0]} {key[1]:<18} exact={true_count:<9} estimate={estimate:<11.0f} error={error:6.2%}  {status}")
+
+    logger.info(f" Worst relative error: {worst:.2%} (standard error {sigma:.2%})")
+    return worst
+
+# Run directly:
+#   python ingestion/src/hll.py                    -> accuracy test on synthetic data (no database)
+#   python ingestion/src/hll.py --update           -> catch the sketches up with gold.fact_events
+#   python ingestion/src/hll.py --check --days 7   -> compare sketches with exact counts
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HyperLogLog distinct-count sketches")
+    parser.add_argument("--update", action="store_true", help="Add new facts to the stored sketches")
+    parser.add_argument("--check", action="store_true", help="Compare stored sketches with exact counts")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--metric", choices=sorted(METRICS), default="actor")
+    args = parser.parse_args()
+
+    if args.update:
+        with psycopg2.connect(**Config.get_db_auth()) as db_conn:
+            logger.info(f" {update_distinct_sketches(db_conn)}")
+        db_conn.close()
+    elif args.check:
+        check_against_exact(args.days, args.metric)
+    else:
+        import random
+        print("--- STARTING TEST ---")
+        rng = random.Random(42)
+        sigma = HyperLogLog().standard_error
+        print(f"Precision {HLL_PRECISION}: standard error {sigma:.2%}, ~95% of estimates within +-{2 * sigma:.2%}")
+
+        for true_count in (10, 1_000, 40_000, 250_000):
+            ids = rng.sample(range(10 ** 9), true_count)
+            sketch = HyperLogLog()
+            sketch.update(ids)
+            sketch.update(ids[: true_count // 2])  # Duplicates must not count
+            estimate = HyperLogLog.from_bytes(sketch.to_bytes()).estimate()
+            print(f"  n={true_count:<8} estimate={estimate:<11.0f} error={abs(estimate - true_count) / true_count:6.2%}"
+                  f"  ({len(sketch.to_bytes())} bytes)")
+
+        # 30 days with overlapping users: merged sketch vs exact union
+        population = rng.sample(range(10 ** 9), 200_000)
+        days, union = [], set()
+        for _ in range(30):
+            active = rng.sample(population, 20_000)
+            union.update(active)
+            day = HyperLogLog()
+            day.update(active)
+            days.append(day)
+        merged = HyperLogLog.union(days).estimate()
+        print(f"  30-day merge: exact={len(union)} estimate={merged:.0f} error={abs(merged - len(union)) / len(union):.2%}")
+        print("--- END TEST ---")
@@ -1,6 +1,7 @@
 import sys
 import time
 import signal
+import argparse
 from pathlib import Path
 
 # --- PATH SETUP ---
@@ -10,9 +11,14 @@ sys.path.append(str(current_dir))
 
 from config import Config
 from logger import get_logger
+import api_client
 from api_client import fetch_events
+from feed_poller import Feed, FeedPoller
+from poll_scheduler import AdaptivePollScheduler
 # Import your specific loader function
 from bronze_loader import load_to_bronze 
+from spool import Spool, SpoolDrainer
+import profiler
 
 # Initialize Logger
 logger = get_logger("ORCHESTRATOR")
@@ -29,9 +35,13 @@ def signal_handler(signum, frame):
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
-def run_pipeline():
+def run_pipeline(profile_runs: int = 0, sample_interval_ms: float = Config.PIPELINE_PROFILE_SAMPLE_MS):
     """
     The main infinite loop that keeps the pipeline running.
+
+    Args:
+        profile_runs (int): Write cProfile + flamegraph stacks for the first N polls (0 = off).
+        sample_interval_ms (float): Sampling profiler interval.
     """
     logger.info(" Pipeline started. Press Ctrl+C to stop.")
     
@@ -42,23 +52,71 @@ def run_pipeline():
         logger.error(str(e))
         sys.exit(1)
 
+    # Watchlist configured -> fan-out polling, otherwise the global firehose
+    poller = FeedPoller.from_config() if Config.GITHUB_WATCHLIST else None
+    scheduler = AdaptivePollScheduler()
+
+    # Write-ahead spool: polling never waits on Postgres, the drainer loads Bronze in the background
+    spool = Spool() if Config.SPOOL_ENABLED else None
+    drainer = SpoolDrainer(spool) if spool else None
+    if drainer:
+        drainer.start()
+        logger.info(f" Spool enabled: {Config.SPOOL_DIR} | Backlog: {spool.backlog()}")
+
+    # Bronze reports arrive late when spooling, so firehose overlap is measured in memory
+    firehose = Feed("events", Config.GITHUB_URL)
+
+    run_profiler = profiler.RunProfiler("bronze", profile_runs, sample_interval_ms)
+
     while not shutdown_flag:
         try:
             start_time = time.time()
-            
-        
-            # The API Client fetches data
-            events = fetch_events()
-            
-            
-            # The Loader puts it into Postgres
-            if events:
-                load_to_bronze(events)
-            
-            
-            #  run every 60 seconds roughly
+            run_profiler.start_run()
+            try:
+                # The API Client fetches data (merged from all due feeds in watchlist mode)
+                events = poller.poll_cycle(cycle_seconds=scheduler.interval) if poller else fetch_events()
+
+
+                # The Loader puts it into Postgres (via the spool if enabled)
+                try:
+                    if spool:
+                        if not spool.append(events):
+                            # Spool is at its disk cap: best effort direct write
+                            load_to_bronze(events)
+                    else:
+                        report = load_to_bronze(events)
+                except Exception:
+                    # Not stored: keep ETags + seen ids as they were so the next poll fetches these again
+                    if poller:
+                        poller.rollback_cycle()
+                    raise
+                if poller:
+                    poller.commit_cycle()
+
+                if spool:
+                    new_events = firehose.remember(events)
+                    report = {"inserted": len(new_events), "duplicates": firehose.last_overlap,
+                              "gaps": int(firehose.last_gap)}
+
+                    backlog = spool.backlog()
+                    logger.info(f" Spool backlog: {backlog['segments']} segments | {backlog['bytes'] / 1e6:.2f} MB")
+
+
+                # Tune the interval from overlap + rate limit headers
+                if poller:
+                    # The poller already drops ids it has seen, so overlap is measured per feed
+                    interval = scheduler.next_interval(
+                        poller.last_report, poller.rate_meta(), requests_per_poll=max(1, poller.last_polled_count)
+                    )
+                else:
+                    interval = scheduler.next_interval(report, api_client.last_response_meta)
+            finally:
+                # Also on errors: stops the sampler + cProfile before the next run starts them again
+                run_profiler.end_run()
+                profiler.report_and_reset(logger, "BRONZE POLL")
+
             elapsed = time.time() - start_time
-            sleep_time = max(10, 60 - elapsed)
+            sleep_time = max(0, interval - elapsed)
             
             logger.info(f" Sleeping for {int(sleep_time)} seconds...")
             
@@ -72,7 +130,20 @@ def run_pipeline():
             logger.info(" Retrying in 60 seconds...")
             time.sleep(60)
 
+    if poller:
+        poller.close()
+    if drainer:
+        # Whatever is not drained yet stays on disk for the next start
+        drainer.stop()
+        spool.close()
+        logger.info(f" Spool closed. Backlog left: {spool.backlog()}")
     logger.info(" Pipeline stopped gracefully.")
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bronze ingestion listener")
+    profiler.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    if args.profile or Config.PIPELINE_PROFILE or args.profile_runs:
+        profiler.enable()
+    run_pipeline(args.profile_runs, args.sample_interval_ms)
\ No newline at end of file
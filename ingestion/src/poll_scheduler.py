@@ -0,0 +1,174 @@
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import get_logger
+
+logger = get_logger("POLL_SCHEDULER")
+
+# Healthy overlap band: some duplicates prove the windows touch, too many waste quota
+TARGET_OVERLAP_LOW = 0.10
+TARGET_OVERLAP_HIGH = 0.50
+
+class AdaptivePollScheduler:
+    """
+    Tunes the Bronze poll interval after every poll.
+
+    Signals:
+    - Overlap ratio (duplicates / fetched) from the Bronze batch report
+        0%        -> the windows did not touch, events were probably missed -> poll much sooner
+        < 10%     -> close to missing events                                -> poll a bit sooner
+        > 50%     -> mostly re-reading old events                           -> back off
+    - X-Poll-Interval: GitHub's minimum, never undercut
+    - X-RateLimit-Remaining / Reset: never poll faster than the quota can sustain until reset
+    """
+
+    def __init__(self, min_interval: float = Config.POLL_MIN_INTERVAL,
+                 max_interval: float = Config.POLL_MAX_INTERVAL,
+                 initial_interval: float = Config.POLL_INITIAL_INTERVAL,
+                 reserve: int = Config.RATE_LIMIT_RESERVE):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = initial_interval
+        self.reserve = reserve
+
+    def budget_floor(self, meta: Dict[str, Any], requests_per_poll: int, now: float) -> float:
+        """Shortest interval the remaining quota can sustain until the reset time."""
+        remaining, reset_at = meta.get("remaining"), meta.get("reset_at")
+        if remaining is None or reset_at is None:
+            return 0.0
+
+        # Never reserve more than 10% (an unauthenticated limit is only 60/hour)
+        limit = meta.get("limit") or (5000 if Config.GITHUB_TOKEN else 60)
+        reserve = min(self.reserve, limit // 10)
+
+        seconds_left = max(0.0, reset_at - now)
+        polls_left = (remaining - reserve) / max(1, requests_per_poll)
+        if polls_left <= 0:
+            # Out of budget: wait for the reset
+            return seconds_left
+        return seconds_left / polls_left
+
+    def next_interval(self, report: Dict[str, int], meta: Dict[str, Any],
+                      requests_per_poll: int = 1, now: Optional[float] = None) -> float:
+        """
+        Args:
+            report (dict): Bronze batch report (inserted / duplicates / errors, optional gaps).
+            meta (dict): api_client.parse_rate_headers() output of the last poll.
+            requests_per_poll (int): API calls one poll costs (feeds polled in watchlist mode).
+
+        Returns:
+            float: Seconds until the next poll (measured from the start of the last one).
+        """
+        now = time.time() if now is None else now
+        fetched = report.get("inserted", 0) + report.get("duplicates", 0)
+        overlap = report.get("duplicates", 0) / fetched if fetched else None
+        previous = self.interval
+
+        if fetched == 0:
+            reason, factor = "empty poll", 1.5
+        elif report.get("gaps") or overlap == 0:
+            reason, factor = "no overlap (gap suspected)", 0.5
+        elif overlap < TARGET_OVERLAP_LOW:
+            reason, factor = "low overlap", 0.8
+        elif overlap > TARGET_OVERLAP_HIGH:
+            # Grows with the waste: 100% duplicates -> 1.5x
+            reason, factor = "high overlap", 1.0 + (overlap - TARGET_OVERLAP_HIGH)
+        else:
+            reason, factor = "in target band", 1.0
+
+        proposed = min(self.max_interval, max(self.min_interval, previous * factor))
+
+        # Hard floors always win over the configured bounds
+        poll_floor = meta.get("poll_interval") or 0
+        budget_floor = self.budget_floor(meta, requests_per_poll, now)
+        self.interval = max(proposed, poll_floor, budget_floor)
+
+        overlap_text = f"{overlap:.0%}" if overlap is not None else "n/a"
+        logger.info(
+            f" Overlap {overlap_text} ({report.get('duplicates', 0)}/{fetched}) -> {reason}"
+            f" | {previous:.0f}s -> {self.interval:.0f}s"
+            f" (floors: poll {poll_floor:.0f}s, budget {budget_floor:.1f}s)"
+        )
+        return self.interval
+
+# --- TEST BLOCK ---
+# Run directly: python ingestion/src/poll_scheduler.py
+# Simulates 6 hours of a bursty feed and compares a fixed 60s poll against the adaptive one.
+if __name__ == "__main__":
+    import math
+    import random
+    import logging
+
+    print("--- STARTING TEST ---")
+    logger.setLevel(logging.WARNING)  # Keep the simulation output readable
+
+    class SimulatedFeed:
+        """
+        An /events-like feed: only the newest `page_size` events are visible,
+        `limit` requests/hour quota, rate varies between quiet and busy periods.
+        """
+
+        def __init__(self, seed: int, page_size: int = 100, limit: int = 5000):
+            self.rng = random.Random(seed)
+            self.page_size = page_size
+            self.limit = limit
+            self.produced = 0
+            self.clock = 0.0
+            self.remaining = limit
+            self.reset_at = 3600.0
+
+        def rate(self, t: float) -> float:
+            # Events/second: 0.3 at night, ~4 at peak
+            return 0.3 + 3.7 * max(0.0, math.sin(t / 3600 * math.pi / 3)) ** 2
+
+        def advance(self, until: float):
+            while self.clock < until:
+                self.clock += self.rng.expovariate(self.rate(self.clock))
+                self.produced += 1
+            if until >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at += 3600
+
+        def poll(self) -> Dict[str, Any]:
+            self.remaining -= 1
+            newest = self.produced
+            ids = range(max(0, newest - self.page_size), newest)
+            return {"ids": ids, "meta": {"limit": self.limit, "remaining": self.remaining,
+                                         "reset_at": self.reset_at, "poll_interval": None}}
+
+    def simulate(adaptive: bool, hours: float = 6, seed: int = 7, limit: int = 5000) -> Dict[str, float]:
+        feed = SimulatedFeed(seed, limit=limit)
+        scheduler = AdaptivePollScheduler(min_interval=5, max_interval=300, initial_interval=60, reserve=100)
+        seen, t, polls = set(), 0.0, 0
+
+        while t < hours * 3600:
+            feed.advance(t)
+            response = feed.poll()
+            polls += 1
+            new = [i for i in response["ids"] if i not in seen]
+            seen.update(new)
+            report = {"inserted": len(new), "duplicates": len(response["ids"]) - len(new)}
+            t += scheduler.next_interval(report, response["meta"], now=t) if adaptive else 60
+
+        return {"captured": len(seen) / feed.produced, "polls_per_hour": polls / hours}
+
+    fixed = simulate(adaptive=False)
+    adaptive = simulate(adaptive=True)
+    print(f"Fixed 60s: captured {fixed['captured']:.1%} | {fixed['polls_per_hour']:.0f} polls/hour")
+    print(f"Adaptive:  captured {adaptive['captured']:.1%} | {adaptive['polls_per_hour']:.0f} polls/hour")
+    print(f"Within quota: {adaptive['polls_per_hour'] <= 5000}")
+
+    # No GITHUB_TOKEN: 60 requests/hour, less than the default reserve of 100
+    fixed = simulate(adaptive=False, limit=60)
+    adaptive = simulate(adaptive=True, limit=60)
+    print(f"Unauthenticated fixed 60s: captured {fixed['captured']:.1%} | {fixed['polls_per_hour']:.0f} polls/hour")
+    print(f"Unauthenticated adaptive:  captured {adaptive['captured']:.1%} | {adaptive['polls_per_hour']:.0f} polls/hour")
+    print(f"Within quota: {adaptive['polls_per_hour'] <= 60}")
+    print("--- END TEST ---")
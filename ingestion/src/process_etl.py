@@ -1,6 +1,7 @@
 import sys
 import time
 import signal
+import argparse
 from datetime import timedelta , datetime
 from pathlib import Path
 
@@ -15,6 +16,7 @@ try:
     from logger import get_logger
     from process_silver import process_silver_layer
     from process_gold import process_gold_layer
+    import profiler
 
 except ImportError as e:
     print(f"CRITICAL ERROR MODULES FAILED TO IMPORT . {e}")
@@ -48,9 +50,13 @@ else:
 
 # Main ETL Function
 
-def run_etl_scheduler():
+def run_etl_scheduler(profile_runs: int = 0, sample_interval_ms: float = Config.PIPELINE_PROFILE_SAMPLE_MS):
     """
     Scheduled Silver + Gold ETL
+
+    Args:
+        profile_runs (int): Write cProfile + flamegraph stacks for the first N ETL runs (0 = off).
+        sample_interval_ms (float): Sampling profiler interval.
     """
     logger.info("=" * 70)
     logger.info(" SILVER + GOLD ETL SCHEDULER")
@@ -59,6 +65,7 @@ def run_etl_scheduler():
     logger.info(f"Schedule: {SCHEDULE_DESCRIPTION}")
     logger.info("Layers: Bronze → Silver → Gold")
     logger.info("Bronze ingestion runs separately (main.py)")
+    logger.info(f"Worker: {Config.WORKER_ID}")
     logger.info("Press Ctrl+C to stop gracefully")
     logger.info("=" * 70)
     
@@ -72,6 +79,7 @@ def run_etl_scheduler():
     
     run_number = 0
     next_run_time = datetime.now()
+    run_profiler = profiler.RunProfiler("silver_gold", profile_runs, sample_interval_ms)
     
     while not shutdown_flag:
         try:
@@ -97,60 +105,69 @@ def run_etl_scheduler():
             # Run ETL
             run_number +=1
             run_start = time.time()
+            run_profiler.start_run()
+            try:
+                logger.info("")
+                logger.info("="*70)
+                logger.info(f" ETL RUN #{run_number} - {datetime.now().strftime('%H:%M:%S')}")
+                logger.info("=" * 70)
 
-            logger.info("")
-            logger.info("="*70)
-            logger.info(f" ETL RUN #{run_number} - {datetime.now().strftime('%H:%M:%S')}")
-            logger.info("=" * 70)
+                silver_success = False
+                gold_success = False
+                gold_skipped = False
+
+                # LAYER 1: SILVER (Bronze → Silver)
+                logger.info("[1/2] Silver Layer...")
+                silver_start = time.time()
 
-            silver_success = False
-            gold_success = False
-    
-            # LAYER 1: SILVER (Bronze → Silver)
-            logger.info("[1/2] Silver Layer...")
-            silver_start = time.time()
-            
-            try:
-                # Call the function from process_silver.py
-                process_silver_layer()
-                
-                silver_duration = time.time() - silver_start
-                logger.info(f" Silver: Completed in {silver_duration:.2f}s")
-                # The logger inside process_silver handles the details
-                silver_success = True
-                
-            except Exception as e:
-                logger.error(f" Silver failed: {e}")
-                logger.warning("  Skipping Gold for this run")
-            
-           
-            # LAYER 2: GOLD (Silver → Gold)
-            
-            if silver_success:
-                logger.info(" [2/2] Gold Layer...")
-                gold_start = time.time()
-                
                 try:
-                    # Call the function from process_gold.py
-                    process_gold_layer()
-                    
-                    gold_duration = time.time() - gold_start
-                    logger.info(f" Gold: Completed in {gold_duration:.2f}s")
-                    gold_success = True
-                    
+                    # Call the function from process_silver.py
+                    process_silver_layer()
+
+                    silver_duration = time.time() - silver_start
+                    logger.info(f" Silver: Completed in {silver_duration:.2f}s")
+                    # The logger inside process_silver handles the details
+                    silver_success = True
+
                 except Exception as e:
-                    logger.error(f"Gold failed: {e}")
-                    logger.warning("Gold will retry next run")
-            
+                    logger.error(f" Silver failed: {e}")
+                    logger.warning("  Skipping Gold for this run")
+
+
+                # LAYER 2: GOLD (Silver → Gold)
+
+                if silver_success:
+                    logger.info(" [2/2] Gold Layer...")
+                    gold_start = time.time()
+
+                    try:
+                        # Call the function from process_gold.py
+                        # False = another worker holds the Gold lease (not a failure)
+                        gold_success = process_gold_layer()
+                        gold_skipped = not gold_success
+
+                        gold_duration = time.time() - gold_start
+                        if gold_skipped:
+                            logger.info(" Gold: Skipped (running on another worker)")
+                        else:
+                            logger.info(f" Gold: Completed in {gold_duration:.2f}s")
+
+                    except Exception as e:
+                        logger.error(f"Gold failed: {e}")
+                        logger.warning("Gold will retry next run")
+            finally:
+                # Also on errors: stops the sampler + cProfile before the next run starts them again
+                run_profiler.end_run()
+                profiler.report_and_reset(logger, f"ETL RUN #{run_number}")
+
             # Run Summary
-          
             run_duration = time.time() - run_start
             
             logger.info("")
             logger.info("=" * 70)
             logger.info(f"RUN #{run_number} COMPLETE")
             logger.info(f"Silver: {'Success' if silver_success else ' Failed'}")
-            logger.info(f"Gold:   {' Success' if gold_success else ' Failed'}")
+            logger.info(f"Gold:   {' Success' if gold_success else (' Skipped' if gold_skipped else ' Failed')}")
             logger.info(f"Total Duration: {run_duration:.2f}s")
             logger.info("=" * 70)
             
@@ -186,4 +203,10 @@ def run_etl_scheduler():
     logger.info("=" * 70)
 
 if __name__ == "__main__":
-    run_etl_scheduler()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Silver + Gold ETL scheduler")
+    profiler.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    if args.profile or Config.PIPELINE_PROFILE or args.profile_runs:
+        profiler.enable()
+    run_etl_scheduler(args.profile_runs, args.sample_interval_ms)
\ No newline at end of file
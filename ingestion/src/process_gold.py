@@ -1,6 +1,11 @@
+import re
 import sys
+import uuid
+import argparse
 import psycopg2
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import List, Tuple
 
 # ==========================================
 # 1. Path Setup (Dynamic & Robust)
@@ -20,6 +25,11 @@ project_root = current_dir.parent.parent
 try:
     from config import Config
     from logger import get_logger
+    from query_profiler import profile_query
+    from profiler import stage
+    from table_stats import add_row_count
+    from coordination import try_acquire_gold_lease, gold_lease_holder, fence_silver_batches
+    from hll import update_distinct_sketches
 except ImportError as e:
     print(f" CRITICAL ERROR: Could not import project modules. {e}")
     sys.exit(1)
@@ -27,19 +37,85 @@ except ImportError as e:
 # Initialize Logger
 logger = get_logger("GOLD_ETL")
 
-def process_gold_layer():
+GOLD_SQL_PATH = project_root / 'warehouse' / 'gold' / 'etl' / 'master_gold_etl.sql'
+
+# Statements between "-- @step <name>" and "-- @end" in the master script
+STEP_PATTERN = re.compile(r"^\s*-- @step (\w+)\n(.*?)^\s*-- @end", re.S | re.M)
+
+def load_gold_steps(script: str) -> List[Tuple[str, str]]:
+    """
+    Cuts the marked statements out of master_gold_etl.sql (profiling mode).
+    The master script is the only copy of the SQL, so profiling measures exactly what production runs.
+
+    Returns:
+        list: (step_name, sql) with v_watermark bound as %(watermark)s.
+    """
+    steps = []
+    for name, body in STEP_PATTERN.findall(script):
+        # Literal % (LIKE patterns) must survive psycopg2's parameter substitution
+        sql = body.strip().rstrip(';').replace('%', '%%')
+        steps.append((name, re.sub(r'\bv_watermark\b', '%(watermark)s', sql)))
+    return steps
+
+def run_profiled_gold_steps(cursor, script: str):
+    """
+    Profiling mode for the Gold ETL.
+    - Runs each marked step of the master script through EXPLAIN (ANALYZE, BUFFERS) inside the open transaction
+    - Stores plan, rows, duration and buffer reads in meta.query_profiles
+    - Flags steps that regressed against their recent history
+    - Adds each step's inserted rows to meta.table_stats
+    """
+    run_id = uuid.uuid4().hex
+    steps = load_gold_steps(script)
+
+    if not steps:
+        raise ValueError(f"No '-- @step' markers found in: {GOLD_SQL_PATH.name}")
+
+    cursor.execute(
+        "SELECT COALESCE(MAX(silver_processed_at), '1970-01-01'::TIMESTAMPTZ) FROM gold.fact_events;"
+    )
+    watermark = cursor.fetchone()[0]
+
+    logger.info(f"Executing Profiled Steps (run {run_id})...")
+    logger.info(f"Watermark: {watermark}")
+
+    for i, (step_name, step_sql) in enumerate(steps, start=1):
+        summary = profile_query(cursor, "gold", step_name, step_sql, {"watermark": watermark}, run_id)
+
+        # "Tuples Inserted" excludes upsert updates -> exactly the rows the table grew by
+        table_name = "gold." + step_name[3:]
+        new_watermark = None
+        if table_name == "gold.fact_events":
+            cursor.execute("SELECT MAX(silver_processed_at) FROM gold.fact_events;")
+            new_watermark = cursor.fetchone()[0]
+        add_row_count(cursor, table_name, summary["rows"], new_watermark)
+
+        flag = " | REGRESSION" if summary["regression"] else ""
+        logger.info(
+            f"[{i}/{len(steps)}] {step_name}: {summary['rows']} rows"
+            f" | Duration: {summary['duration_ms']:.0f} ms"
+            f" | Buffers read: {summary['shared_read_blocks']}{flag}"
+        )
+
+def process_gold_layer() -> bool:
     """
     Orchestrates the Gold ETL transaction.
     - Connects with Autocommit OFF
-    - Runs the Master SQL Script
+    - Takes the Gold lease (skips the run if another worker holds it)
+    - Fences Silver so the watermark cannot skip batches still in flight
+    - Runs the Master SQL Script (or the profiled steps if PROFILE_QUERIES=true)
     - Captures DB logs (RAISE NOTICE)
     - Commits on success / Rolls back on failure
+    - Updates the distinct-count sketches (own transaction, still under the lease)
+
+    Returns:
+        bool: True if Gold ran, False if skipped (lease held elsewhere).
     """
     conn = None
     cursor = None
     
     # Path to your Master SQL File
-    sql_file_path = project_root / 'warehouse' / 'gold' / 'etl' / 'master_gold_etl.sql'
+    sql_file_path = GOLD_SQL_PATH
 
     try:
         logger.info("=" * 60)
@@ -57,6 +133,16 @@ def process_gold_layer():
         conn.autocommit = False 
         cursor = conn.cursor()
 
+        # Only one worker runs Gold. The lease lives as long as this connection.
+        if not try_acquire_gold_lease(cursor):
+            logger.info(f" Gold lease held by {gold_lease_holder(cursor) or 'another worker'}. Skipping this run.")
+            conn.rollback()
+            return False
+
+        # Waits for in-flight Silver batches; new ones wait for our COMMIT
+        with stage("db.gold_fence"):
+            fence_silver_batches(cursor)
+
 
         #  Read & Execute SQL
 
@@ -66,8 +152,13 @@ def process_gold_layer():
         with open(sql_file_path, 'r', encoding='utf-8') as f:
             sql_script = f.read()
 
-        logger.info("Executing Transactional SQL...")
-        cursor.execute(sql_script)
+        if Config.PROFILE_QUERIES:
+            # Same steps, one statement at a time through EXPLAIN ANALYZE
+            run_profiled_gold_steps(cursor, sql_script)
+        else:
+            logger.info("Executing Transactional SQL...")
+            with stage("db.gold_script"):
+                cursor.execute(sql_script)
 
         #  Capture & Log DB Output
 
@@ -81,9 +172,22 @@ def process_gold_layer():
 
         # Commit Transaction
 
-        conn.commit()
+        with stage("db.commit"):
+            conn.commit()
         logger.info("COMMIT SUCCESSFUL: Gold Layer is up to date.")
 
+        # Sketches follow their own watermark: if this fails, the next run catches up
+        if Config.DISTINCT_SKETCHES_ENABLED:
+            try:
+                with stage("db.gold_sketches"):
+                    report = update_distinct_sketches(conn)
+                logger.info(f" Distinct sketches: {report['facts']} facts -> {report['sketches']} sketches"
+                            f" ({report['created']} new)")
+            except Exception as sketch_err:
+                conn.rollback()
+                logger.error(f" Sketch update failed (will catch up next run): {sketch_err}")
+        return True
+
     except psycopg2.Error as db_err:
 
         # Step 5: Handle DB Failures
@@ -110,5 +214,52 @@ def process_gold_layer():
         if conn: conn.close()
         logger.info(" Database connection closed.")
 
+def backfill_event_details() -> bool:
+    """
+    One-time fill of the satellite facts (gold.fact_*_events) for facts loaded before they existed.
+    Regular runs only extract details for facts past the Gold watermark.
+    Re-runs the marked satellite steps of the master script from the beginning of time:
+    ON CONFLICT DO NOTHING skips rows that are already there, so it is safe to repeat.
+
+    Returns:
+        bool: True if the backfill ran, False if skipped (lease held elsewhere).
+    """
+    steps = [(name, sql) for name, sql in load_gold_steps(GOLD_SQL_PATH.read_text(encoding='utf-8'))
+             if name[3:].startswith("fact_") and name[3:] != "fact_events"]
+
+    conn = psycopg2.connect(**Config.get_db_auth())
+    try:
+        with conn.cursor() as cursor:
+            if not try_acquire_gold_lease(cursor):
+                logger.info(f" Gold lease held by {gold_lease_holder(cursor) or 'another worker'}. Try again later.")
+                conn.rollback()
+                return False
+
+            for step_name, step_sql in steps:
+                with stage("db.gold_backfill"):
+                    cursor.execute(step_sql, {"watermark": datetime(1970, 1, 1, tzinfo=timezone.utc)})
+                add_row_count(cursor, "gold." + step_name[3:], cursor.rowcount)
+                logger.info(f" Backfill {step_name}: {cursor.rowcount} rows")
+        conn.commit()
+        logger.info("COMMIT SUCCESSFUL: Satellite facts backfilled.")
+        return True
+    except Exception as e:
+        logger.error(f" Backfill failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+# Run directly:
+#   python ingestion/src/process_gold.py                     -> one Gold run
+#   python ingestion/src/process_gold.py --backfill-details  -> satellite facts for older facts (once)
 if __name__ == "__main__":
-    process_gold_layer()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gold layer ETL")
+    parser.add_argument("--backfill-details", action="store_true",
+                        help="Extract typed payload fields for facts loaded before the satellite tables existed")
+    args = parser.parse_args()
+
+    if args.backfill_details:
+        backfill_event_details()
+    else:
+        process_gold_layer()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import sys
 import json
+import uuid
 import psycopg2    
 import logging    
 from psycopg2.extras import execute_values
@@ -12,6 +13,10 @@ sys.path.append(str(current_dir))
 
 from config import Config
 from logger import get_logger
+from query_profiler import profile_query, profile_values_query
+from profiler import stage
+from table_stats import add_row_count
+from coordination import enter_silver_batch
 
 
 
@@ -30,9 +35,14 @@ for handler in silver_logger.handlers[:]:
 
 BATCH_SIZE = 5000
 
+# EXPLAIN ANALYZE executes the fetch a second time: only sample every Nth batch
+PROFILE_FETCH_EVERY = 10
+
 # ============================================================
 # 1. FETCH QUERY
 # ============================================================
+# SKIP LOCKED: several Silver workers can run at once - each claims a different
+# set of Bronze rows (locked until its batch commits) instead of waiting on the others.
 FETCH_UNPROCESSED = """
     SELECT full_json
     FROM bronze.raw_events b
@@ -40,7 +50,8 @@ FETCH_UNPROCESSED = """
         SELECT 1 FROM silver.events s
         WHERE s.event_id = b.event_id
     )
-    LIMIT %s;
+    LIMIT %s
+    FOR UPDATE OF b SKIP LOCKED;
 """
 
 INSERT_SILVER = """
@@ -49,12 +60,17 @@ INSERT_SILVER = """
         actor_id, actor_login, 
         repo_id, repo_name, 
         org_id, org_login, 
-        event_time, is_public, payload
+        event_time, is_public, payload,
+        processed_at
     )
     VALUES %s
     ON CONFLICT (event_id) DO NOTHING;
 """
 
+# processed_at = start of the INSERT statement, i.e. after the fence was taken (see coordination.py).
+# The column default (CURRENT_TIMESTAMP) is the transaction start - before the fence.
+SILVER_VALUES_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, statement_timestamp())"
+
 # ============================================================
 # Input: Only the JSON Dict
 # Output: The Silver Tuple
@@ -124,12 +140,24 @@ def process_silver_layer():
     
     conn = None
     try:
-        conn = psycopg2.connect(**Config.get_db_auth())
+        with stage("db.connect"):
+            conn = psycopg2.connect(**Config.get_db_auth())
+        run_id = uuid.uuid4().hex
+        batch_number = 0
         
         while True:
             with conn.cursor() as cursor:
-                cursor.execute(FETCH_UNPROCESSED, (BATCH_SIZE,))
-                rows = cursor.fetchall()
+                # Before any other statement of the batch: see coordination.py
+                enter_silver_batch(cursor)
+
+                if Config.PROFILE_QUERIES and batch_number % PROFILE_FETCH_EVERY == 0:
+                    # Plan of the anti-join (row locks only, taken again by the real fetch in this transaction)
+                    profile_query(cursor, "silver", "fetch_unprocessed", FETCH_UNPROCESSED, (BATCH_SIZE,), run_id)
+
+                # Includes psycopg2 decoding the JSONB column
+                with stage("db.fetch"):
+                    cursor.execute(FETCH_UNPROCESSED, (BATCH_SIZE,))
+                    rows = cursor.fetchall()
                 
                 if not rows:
                     pipeline_logger.info(" Silver Layer is fully up to date.")
@@ -137,17 +165,33 @@ def process_silver_layer():
                     break
                 
                 silver_batch = []
-                for row in rows:
-                    # row[0] is the JSON dict because we only selected full_json
-                    extracted = extract_event(row[0]) 
-                    if extracted:
-                        silver_batch.append(extracted)
+                with stage("silver.extract_event"):
+                    for row in rows:
+                        # row[0] is the JSON dict because we only selected full_json
+                        extracted = extract_event(row[0]) 
+                        if extracted:
+                            silver_batch.append(extracted)
 
                 if silver_batch:
-                    execute_values(cursor, INSERT_SILVER, silver_batch)
-                    conn.commit()
+                    if Config.PROFILE_QUERIES:
+                        # EXPLAIN ANALYZE performs the insert itself
+                        summary = profile_values_query(cursor, "silver", "insert_events", INSERT_SILVER, silver_batch, run_id,
+                                                       template=SILVER_VALUES_TEMPLATE)
+                        inserted = summary["rows"]
+                    else:
+                        with stage("db.insert"):
+                            # One statement for the whole batch so rowcount = rows inserted
+                            execute_values(cursor, INSERT_SILVER, silver_batch, template=SILVER_VALUES_TEMPLATE,
+                                           page_size=len(silver_batch))
+                            inserted = cursor.rowcount
+
+                    add_row_count(cursor, "silver.events", inserted)
+                    with stage("db.commit"):
+                        conn.commit()
                     pipeline_logger.info(f"   Saved {len(silver_batch)} events.")
                     silver_logger.info(f"   Saved {len(silver_batch)} events.")
+
+                batch_number += 1
                 
     except Exception as e:
         pipeline_logger.error(f" ETL Failed: {e}")
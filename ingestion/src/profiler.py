@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import logging
+import threading
+import cProfile
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Dict, Optional
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import LOG_DIR, get_logger
+
+logger = get_logger("PROFILER", log_filename="profile.log")
+
+# Output: ingestion/logs/profile/<label>-run<N>-<timestamp>.prof / .collapsed
+PROFILE_DIR = LOG_DIR / "profile"
+
+# ============================================================
+# 1. STATE
+# ============================================================
+# Disabled = every hook is a shared nullcontext / a single flag check
+_enabled = Config.PIPELINE_PROFILE
+_NULL = nullcontext()
+_stats: Dict[str, list] = {}          # stage -> [count, total_seconds, max_seconds]
+_stats_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable():
+    """Turns the stage timers on (CLI --profile) and times logging handlers too."""
+    global _enabled
+    _enabled = True
+    instrument_loggers()
+
+
+def add_cli_arguments(parser):
+    """Shared --profile flags for main.py and process_etl.py."""
+    parser.add_argument("--profile", action="store_true",
+                        help="Enable per-stage timers (same as PIPELINE_PROFILE=true)")
+    parser.add_argument("--profile-runs", type=int, default=Config.PIPELINE_PROFILE_RUNS,
+                        help="Also write cProfile + sampled flamegraph stacks for the first N runs")
+    parser.add_argument("--sample-interval-ms", type=float, default=Config.PIPELINE_PROFILE_SAMPLE_MS,
+                        help="Sampling profiler interval in milliseconds")
+
+# ============================================================
+# 2. STAGE TIMERS
+# ============================================================
+class _StageTimer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _stats_lock:
+            entry = _stats.get(self.name)
+            if entry is None:
+                _stats[self.name] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+        return False
+
+
+def stage(name: str):
+    """
+    Times a block:  with profiler.stage("db.execute"): ...
+    Stage names are "<kind>.<what>" (http.*, json.*, db.*, silver.*, logging) so the report groups them.
+    """
+    return _StageTimer(name) if _enabled else _NULL
+
+
+def timed(name: str):
+    """Decorator version of stage(); checks the flag per call so --profile works after import."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _StageTimer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def report_and_reset(target_logger: logging.Logger, title: str = "PROFILE"):
+    """Logs the stage table (slowest first) and starts a fresh window."""
+    if not _enabled:
+        return
+
+    with _stats_lock:
+        snapshot = dict(_stats)
+        _stats.clear()
+
+    if not snapshot:
+        return
+
+    total = sum(entry[1] for entry in snapshot.values())
+    target_logger.info(f"--- {title}: stage timings ---")
+    for name, (count, seconds, worst) in sorted(snapshot.items(), key=lambda kv: kv[1][1], reverse=True):
+        share = seconds / total * 100 if total else 0
+        target_logger.info(
+            f"   {name:<24} {seconds * 1000:>10.1f} ms  {share:5.1f}%  "
+            f"calls={count:<7} avg={seconds / count * 1000:.2f} ms  max={worst * 1000:.1f} ms"
+        )
+
+
+def instrument_loggers():
+    """Wraps every handler of our loggers so time spent in logging shows up as stage 'logging'."""
+    for candidate in list(logging.Logger.manager.loggerDict.values()):
+        if not isinstance(candidate, logging.Logger):
+            continue
+        for handler in candidate.handlers:
+            if getattr(handler, "_profiled", False):
+                continue
+            handler.emit = timed("logging")(handler.emit)
+            handler._profiled = True
+
+# ============================================================
+# 3. SAMPLING PROFILER (flamegraph-compatible collapsed stacks)
+# ============================================================
+class SamplingProfiler(threading.Thread):
+    """
+    Samples the stacks of all threads every `interval` seconds.
+    Output lines look like "thread;func (file.py:12);func (file.py:40) 17",
+    which flamegraph.pl / speedscope read directly.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="sampling-profiler", daemon=True)
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write_collapsed(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RunProfiler:
+    """
+    Wraps the first N loop iterations with cProfile + the sampling profiler.
+
+    Usage:
+        run_profiler = RunProfiler("bronze", runs=3, sample_interval_ms=5)
+        while ...:
+            with run_profiler:
+                ...
+    start_run() / end_run() must be paired with try/finally when used directly:
+    a second cProfile.enable() while one is active raises ValueError (Python 3.12+).
+    """
+
+    def __init__(self, label: str, runs: int, sample_interval_ms: float):
+        self.label = label
+        self.runs_left = runs
+        self.sample_interval = sample_interval_ms / 1000
+        self.run_number = 0
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[SamplingProfiler] = None
+
+    def __enter__(self):
+        self.start_run()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_run()
+        return False
+
+    def start_run(self):
+        # A run that was never ended (no try/finally) would keep its profilers active
+        self.end_run()
+        if self.runs_left <= 0:
+            return
+        self.run_number += 1
+        self._sampler = SamplingProfiler(self.sample_interval)
+        self._sampler.start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def end_run(self):
+        if self._cprofile is None:
+            return
+
+        self._cprofile.disable()
+        self._sampler.stop()
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.label}-run{self.run_number}-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self._cprofile.dump_stats(PROFILE_DIR / f"{stem}.prof")
+        self._sampler.write_collapsed(PROFILE_DIR / f"{stem}.collapsed")
+        logger.info(f" Wrote {stem}.prof / .collapsed ({sum(self._sampler.samples.values())} samples)")
+
+        self._cprofile = None
+        self._sampler = None
+        self.runs_left -= 1
+
+# --- TEST BLOCK ---
+# Run directly: python ingestion/src/profiler.py
+if __name__ == "__main__":
+    import json
+
+    print("--- STARTING TEST ---")
+
+    # Disabled: hooks must be (almost) free
+    _enabled = False
+    start = time.perf_counter()
+    for _ in range(100_000):
+        with stage("noop"):
+            pass
+    print(f"Disabled overhead: {(time.perf_counter() - start) / 100_000 * 1e9:.0f} ns per stage")
+
+    enable()
+    run_profiler = RunProfiler("selftest", runs=1, sample_interval_ms=1)
+    with run_profiler:
+        for _ in range(2000):
+            with stage("json.encode"):
+                json.dumps({"id": "1", "payload": list(range(200))})
+    report_and_reset(logger, "SELF TEST")
+    print(f"Output in: {PROFILE_DIR}")
+    print("--- END TEST ---")
@@ -0,0 +1,230 @@
+import sys
+import json
+import hashlib
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from psycopg2.extras import execute_values
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import get_logger
+
+logger = get_logger("QUERY_PROFILER", log_filename="query_profiles.log")
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+# Ignore "regressions" that are only noise on tiny steps
+MIN_DURATION_DELTA_MS = 50.0
+MIN_READ_BLOCKS_DELTA = 100
+
+# ============================================================
+# 1. SQL
+# ============================================================
+INSERT_PROFILE = """
+    INSERT INTO meta.query_profiles (
+        run_id, layer, step_name,
+        rows_processed, duration_ms, planning_ms,
+        shared_hit_blocks, shared_read_blocks,
+        plan_signature, plan,
+        is_regression, regression_reason
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+"""
+
+FETCH_HISTORY = """
+    SELECT duration_ms, shared_read_blocks, plan_signature, rows_processed
+    FROM meta.query_profiles
+    WHERE layer = %s AND step_name = %s
+    ORDER BY captured_at DESC
+    LIMIT %s;
+"""
+
+# ============================================================
+# 2. PLAN PARSING (Pure Python - no DB needed)
+# ============================================================
+def summarize_plan(explain_output: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduces the FORMAT JSON output of EXPLAIN ANALYZE to the metrics we track.
+
+    Args:
+        explain_output (list): The parsed JSON document (psycopg2 decodes it for us).
+    """
+    document = explain_output[0]
+    root = document["Plan"]
+
+    # Writes (ModifyTable) report what they inserted, reads report what they returned
+    if "Tuples Inserted" in root:
+        rows = root["Tuples Inserted"]
+    else:
+        rows = root.get("Actual Rows", 0) * root.get("Actual Loops", 1)
+
+    return {
+        "rows": int(rows),
+        "duration_ms": float(document.get("Execution Time", 0.0)),
+        "planning_ms": float(document.get("Planning Time", 0.0)),
+        # Buffer counters on the root node are cumulative over the whole tree
+        "shared_hit_blocks": int(root.get("Shared Hit Blocks", 0)),
+        "shared_read_blocks": int(root.get("Shared Read Blocks", 0)),
+        "plan_signature": plan_signature(root),
+        "plan": explain_output,
+    }
+
+
+def plan_signature(node: Dict[str, Any]) -> str:
+    """
+    Fingerprints the shape of a plan (node types, relations, indexes).
+    Row counts and timings are ignored, so the hash only changes when the planner flips.
+    """
+    def _shape(n: Dict[str, Any]) -> list:
+        return [
+            n.get("Node Type"),
+            n.get("Relation Name"),
+            n.get("Index Name"),
+            n.get("Join Type"),
+            [_shape(child) for child in n.get("Plans", [])],
+        ]
+
+    return hashlib.md5(json.dumps(_shape(node)).encode("utf-8")).hexdigest()
+
+
+def detect_regression(current: Dict[str, Any], history: Sequence[tuple],
+                      factor: float, min_history: int = 3) -> Optional[str]:
+    """
+    Compares one step against its recent history, per row processed:
+    Silver batches range from a few rows to BATCH_SIZE, so raw durations are not comparable.
+
+    Args:
+        current (dict): Output of summarize_plan().
+        history (list): (duration_ms, shared_read_blocks, plan_signature, rows_processed) rows, newest first.
+        factor (float): How many times the median counts as a regression.
+        min_history (int): Don't judge until we have this many previous runs.
+
+    Returns:
+        str | None: A human readable reason, or None if the step looks normal.
+    """
+    if len(history) < min_history:
+        return None
+
+    # Median cost per row, scaled to this run's row count
+    rows = max(int(current["rows"] or 0), 1)
+    ms_per_row = statistics.median(float(h[0] or 0) / max(int(h[3] or 0), 1) for h in history)
+    reads_per_row = statistics.median(int(h[1] or 0) / max(int(h[3] or 0), 1) for h in history)
+    expected_duration = ms_per_row * rows
+    expected_reads = reads_per_row * rows
+
+    reasons = []
+
+    duration = current["duration_ms"]
+    if duration > expected_duration * factor and duration - expected_duration > MIN_DURATION_DELTA_MS:
+        reasons.append(
+            f"duration {duration:.1f} ms for {rows} rows vs {expected_duration:.1f} ms expected"
+            f" (median {ms_per_row:.3f} ms/row)"
+        )
+
+    reads = current["shared_read_blocks"]
+    if reads > expected_reads * factor and reads - expected_reads > MIN_READ_BLOCKS_DELTA:
+        reasons.append(
+            f"buffer reads {reads} for {rows} rows vs {expected_reads:.0f} expected"
+            f" (median {reads_per_row:.2f} blocks/row)"
+        )
+
+    if not reasons:
+        return None
+
+    # A slowdown that coincides with a new plan shape is almost always the planner
+    if history[0][2] and history[0][2] != current["plan_signature"]:
+        reasons.append("plan changed since previous run")
+
+    return "; ".join(reasons)
+
+# ============================================================
+# 3. PROFILING (Runs the statement through EXPLAIN ANALYZE)
+# ============================================================
+def profile_query(cursor, layer: str, step_name: str, sql: str,
+                  params: Any = None, run_id: str = "") -> Dict[str, Any]:
+    """
+    Executes `sql` wrapped in EXPLAIN ANALYZE and records the plan.
+
+    WARNING: EXPLAIN ANALYZE really runs the statement - an INSERT inserts.
+    Use it *instead of* cursor.execute(), never in addition to it.
+    """
+    cursor.execute(EXPLAIN_PREFIX + sql, params)
+    summary = summarize_plan(cursor.fetchone()[0])
+    return _record_profile(cursor, layer, step_name, summary, run_id)
+
+
+def profile_values_query(cursor, layer: str, step_name: str, sql: str,
+                         values: List[tuple], run_id: str = "", template: str = None) -> Dict[str, Any]:
+    """
+    Same as profile_query() but for `execute_values` statements (VALUES %s).
+    The whole batch is sent as one page so we get exactly one plan back.
+    """
+    result = execute_values(cursor, EXPLAIN_PREFIX + sql, values, template=template,
+                            page_size=max(len(values), 1), fetch=True)
+    summary = summarize_plan(result[0][0])
+    return _record_profile(cursor, layer, step_name, summary, run_id)
+
+
+def _record_profile(cursor, layer: str, step_name: str,
+                    summary: Dict[str, Any], run_id: str) -> Dict[str, Any]:
+    """Runs the regression check and saves the profile row (same transaction as the step)."""
+    cursor.execute(FETCH_HISTORY, (layer, step_name, Config.PROFILE_HISTORY_RUNS))
+    history = cursor.fetchall()
+
+    if history and history[0][2] and history[0][2] != summary["plan_signature"]:
+        logger.warning(f" PLAN CHANGED: {layer}.{step_name}")
+
+    reason = detect_regression(summary, history, Config.PROFILE_REGRESSION_FACTOR)
+    if reason:
+        logger.warning(f" REGRESSION: {layer}.{step_name} -> {reason}")
+
+    cursor.execute(INSERT_PROFILE, (
+        run_id, layer, step_name,
+        summary["rows"], summary["duration_ms"], summary["planning_ms"],
+        summary["shared_hit_blocks"], summary["shared_read_blocks"],
+        summary["plan_signature"], json.dumps(summary["plan"]),
+        reason is not None, reason,
+    ))
+
+    logger.info(
+        f" {layer}.{step_name}: {summary['rows']} rows | {summary['duration_ms']:.1f} ms"
+        f" | hit {summary['shared_hit_blocks']} / read {summary['shared_read_blocks']} blocks"
+    )
+    summary["regression"] = reason
+    return summary
+
+# --- TEST BLOCK ---
+# Run directly: python ingestion/src/query_profiler.py
+if __name__ == "__main__":
+    print("--- STARTING TEST ---")
+
+    def _fake_explain(ms, reads, node="Seq Scan"):
+        return [{
+            "Plan": {
+                "Node Type": "ModifyTable", "Tuples Inserted": 10,
+                "Shared Hit Blocks": 5, "Shared Read Blocks": reads,
+                "Plans": [{"Node Type": node, "Relation Name": "events"}],
+            },
+            "Planning Time": 0.1,
+            "Execution Time": ms,
+        }]
+
+    baseline = summarize_plan(_fake_explain(100.0, 50))
+    history = [(100.0, 50, baseline["plan_signature"], 10)] * 5
+
+    same = summarize_plan(_fake_explain(110.0, 60))
+    print(f"Normal run flagged:  {detect_regression(same, history, 2.0)}")
+
+    slow = summarize_plan(_fake_explain(900.0, 5000, node="Index Scan"))
+    print(f"Slow run flagged:    {detect_regression(slow, history, 2.0)}")
+
+    # Small batches in the history, one full batch now: more rows is not a regression
+    small_batches = [(8.0, 2, baseline["plan_signature"], 50)] * 5
+    full_batch = dict(summarize_plan(_fake_explain(300.0, 200)), rows=5000)
+    print(f"Full batch flagged:  {detect_regression(full_batch, small_batches, 2.0)}")
+    print("--- END TEST ---")
@@ -0,0 +1,182 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import psycopg2
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+
+MAX_TERM_LENGTH = 100
+MIN_TRIGRAM_LENGTH = 3     # Shorter terms have no full trigram: the GIN index can't narrow them down
+CANDIDATES_PER_BRANCH = 5  # x limit: rows each match branch may contribute before ranking
+
+# Match quality, best first (also the tier number returned by the SQL)
+MATCH_TIERS = ("exact", "prefix", "substring", "fuzzy")
+
+# ============================================================
+# 1. SEARCHABLE ENTITIES
+# ============================================================
+# Every column listed under "exact" / "prefix" / "substring" has a matching
+# LOWER(...) index in warehouse/gold/08_search_indexes.sql.
+ENTITIES: Dict[str, Dict[str, Any]] = {
+    "repos": {
+        "table": "gold.dim_repos",
+        "id": "repo_id",
+        "name": "repo_name",
+        "exact": ["repo_name", "repo_project"],
+        "prefix": ["repo_name", "repo_project"],   # 'owner/...' is a repo_name prefix
+        "substring": "repo_name",
+        "rank_exact": ["repo_name", "repo_project", "repo_owner"],
+    },
+    "actors": {
+        "table": "gold.dim_actors",
+        "id": "actor_id",
+        "name": "actor_login",
+        "exact": ["actor_login"],
+        "prefix": ["actor_login"],
+        "substring": "actor_login",
+        "rank_exact": ["actor_login"],
+    },
+}
+
+
+def normalize_term(term: str) -> str:
+    """Lower-cased, trimmed search term. Raises ValueError if empty or too long."""
+    term = (term or "").strip().lower()
+    if not term:
+        raise ValueError("Search term must not be empty")
+    if len(term) > MAX_TERM_LENGTH:
+        raise ValueError(f"Search term must be at most {MAX_TERM_LENGTH} characters")
+    return term
+
+
+def escape_like(term: str) -> str:
+    """Makes %, _ and backslash literal inside a LIKE pattern."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# ============================================================
+# 2. QUERY BUILDER
+# ============================================================
+def build_search_query(entity: str, term: str, limit: int) -> Tuple[str, Dict[str, Any]]:
+    """
+    One statement per entity:
+    - Candidate branches (exact / prefix / substring / fuzzy), each an index scan capped
+      at CANDIDATES_PER_BRANCH x limit rows, so a common term never sorts millions of rows
+    - Ranking: match tier, then trigram similarity, then the most recently active entity
+
+    Table and column names come from ENTITIES, never from the request.
+    """
+    spec = ENTITIES[entity]
+    table, id_col, name_col = spec["table"], spec["id"], spec["name"]
+
+    params = {
+        "term": term,
+        "prefix": escape_like(term) + "%",
+        "substring": "%" + escape_like(term) + "%",
+        "pool": limit * CANDIDATES_PER_BRANCH,
+        "limit": limit,
+    }
+
+    branches = [
+        f"(SELECT {id_col} FROM {table} WHERE LOWER({col}) = %(term)s LIMIT %(pool)s)"
+        for col in spec["exact"]
+    ] + [
+        f"(SELECT {id_col} FROM {table} WHERE LOWER({col}) LIKE %(prefix)s LIMIT %(pool)s)"
+        for col in spec["prefix"]
+    ]
+    if len(term) >= MIN_TRIGRAM_LENGTH:
+        substring_col = spec["substring"]
+        branches += [
+            f"(SELECT {id_col} FROM {table} WHERE LOWER({substring_col}) LIKE %(substring)s LIMIT %(pool)s)",
+            # %% = pg_trgm similarity operator (escaped for psycopg2)
+            f"(SELECT {id_col} FROM {table} WHERE LOWER({substring_col}) %% %(term)s"
+            f" ORDER BY similarity(LOWER({substring_col}), %(term)s) DESC LIMIT %(pool)s)",
+        ]
+
+    candidates = "\n            UNION ".join(branches)
+    exact_match = " OR ".join(f"LOWER(e.{col}) = %(term)s" for col in spec["rank_exact"])
+    prefix_match = " OR ".join(f"LOWER(e.{col}) LIKE %(prefix)s" for col in spec["prefix"])
+
+    sql = f"""
+        WITH candidates AS (
+            {candidates}
+        )
+        SELECT
+            e.{id_col} AS id,
+            e.{name_col} AS name,
+            CASE
+                WHEN {exact_match} THEN 0
+                WHEN {prefix_match} THEN 1
+                WHEN LOWER(e.{spec["substring"]}) LIKE %(substring)s THEN 2
+                ELSE 3
+            END AS tier,
+            similarity(LOWER(e.{spec["substring"]}), %(term)s) AS score
+        FROM {table} e
+        JOIN candidates c ON c.{id_col} = e.{id_col}
+        WHERE e.{id_col} != -1
+        ORDER BY tier, score DESC, e.last_event_time DESC NULLS LAST, e.{name_col}
+        LIMIT %(limit)s;
+    """
+    return sql, params
+
+# ============================================================
+# 3. SEARCH
+# ============================================================
+def search(cursor, term: str, entity: str = "all", limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Ranked matches for the search box: exact > prefix > substring > fuzzy (typos).
+
+    Args:
+        entity (str): 'repos', 'actors' or 'all' (both, merged by rank).
+
+    Returns:
+        list: {"type", "id", "name", "match", "score"} dicts, best first.
+    """
+    term = normalize_term(term)
+    entities = list(ENTITIES) if entity == "all" else [entity]
+    if any(name not in ENTITIES for name in entities):
+        raise ValueError(f"Unknown entity: {entity}")
+
+    results = []
+    for name in entities:
+        sql, params = build_search_query(name, term, limit)
+        cursor.execute(sql, params)
+        for entity_id, label, tier, score in cursor.fetchall():
+            results.append({
+                "type": name[:-1],
+                "id": entity_id,
+                "name": label,
+                "match": MATCH_TIERS[tier],
+                "score": round(float(score), 3),
+            })
+
+    # 'all': both lists are already ranked - merge them on the same key
+    results.sort(key=lambda r: (MATCH_TIERS.index(r["match"]), -r["score"]))
+    return results[:limit]
+
+# Run directly:
+#   python ingestion/src/search.py torvalds               -> repos + actors
+#   python ingestion/src/search.py "linux kernl" --entity repos
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search repo names and actor logins")
+    parser.add_argument("term")
+    parser.add_argument("--entity", choices=["all"] + list(ENTITIES), default="all")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    with psycopg2.connect(**Config.get_db_auth()) as conn:
+        with conn.cursor() as cursor:
+            start = time.perf_counter()
+            matches = search(cursor, args.term, args.entity, args.limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for match in matches:
+        print(f"{match['match']:<10} {match['score']:<6} {match['type']:<6} {match['name']}")
+    print(f"{len(matches)} matches in {elapsed_ms:.1f} ms")
+    conn.close()
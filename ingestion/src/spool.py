@@ -0,0 +1,307 @@
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import psycopg2
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import get_logger
+from bronze_loader import bulk_load_to_bronze
+
+logger = get_logger("SPOOL", log_filename="bronze.log")
+
+# ============================================================
+# 1. RECORD FORMAT
+# ============================================================
+# [length: 4 bytes][crc32: 4 bytes][flags: 1 byte][payload: length bytes]
+# payload = JSON list of events (one record per fetched batch), optionally zlib-compressed
+RECORD_HEADER = struct.Struct(">IIB")
+FLAG_ZLIB = 0x01
+
+OPEN_SUFFIX = ".open"      # Segment currently being written
+SEALED_SUFFIX = ".seg"     # Complete segment, ready to drain
+
+
+def encode_record(events: List[Dict[str, Any]], compress: bool) -> bytes:
+    payload = json.dumps(events, separators=(",", ":")).encode("utf-8")
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, 1)  # Level 1: cheap, still ~5x on GitHub JSON
+        flags |= FLAG_ZLIB
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload), flags) + payload
+
+
+def read_segment(path: Path) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields the event batches stored in one segment.
+    Stops at the first torn or corrupt record (a crash mid-write) instead of raising.
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if not header:
+                return
+            if len(header) < RECORD_HEADER.size:
+                logger.warning(f" Torn record header at end of {path.name}. Ignoring tail.")
+                return
+
+            length, crc, flags = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                logger.warning(f" Corrupt/torn record in {path.name}. Ignoring tail.")
+                return
+
+            if flags & FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+            yield json.loads(payload)
+
+# ============================================================
+# 2. SPOOL (Append side + segment bookkeeping)
+# ============================================================
+class Spool:
+    """
+    Local write-ahead log for fetched batches.
+    - Appends are length-prefixed + CRC-checked
+    - fsync is batched (every N records or T seconds)
+    - Segments roll at a size limit, or once they are `max_age` seconds old (quiet feeds)
+    - The total spool is capped on disk
+    """
+
+    def __init__(self, directory: Path = Config.SPOOL_DIR,
+                 segment_bytes: int = Config.SPOOL_SEGMENT_BYTES,
+                 max_bytes: int = Config.SPOOL_MAX_BYTES,
+                 compress: bool = Config.SPOOL_COMPRESS,
+                 fsync_every: int = Config.SPOOL_FSYNC_EVERY,
+                 fsync_seconds: float = Config.SPOOL_FSYNC_SECONDS,
+                 max_age: float = Config.SPOOL_SEGMENT_MAX_AGE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._active_path: Optional[Path] = None
+        self._active_size = 0
+        self._opened_at = 0.0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.dropped_batches = 0
+
+        # Crash recovery: a leftover .open segment is sealed as-is (read_segment drops a torn tail)
+        for leftover in self.directory.glob(f"*{OPEN_SUFFIX}"):
+            leftover.rename(leftover.with_suffix(SEALED_SUFFIX))
+            logger.warning(f" Recovered unsealed segment {leftover.name}")
+
+        existing = sorted(self.directory.glob(f"*{SEALED_SUFFIX}"))
+        self._next_seq = int(existing[-1].stem) + 1 if existing else 1
+        self.total_bytes = sum(p.stat().st_size for p in existing)
+
+    # --- Append ---
+    def append(self, events: List[Dict[str, Any]]) -> bool:
+        """
+        Appends one batch. Returns False (batch not spooled) if the disk cap is reached.
+        """
+        if not events:
+            return True
+
+        record = encode_record(events, self.compress)
+
+        with self._lock:
+            if self.total_bytes + len(record) > self.max_bytes:
+                self.dropped_batches += 1
+                logger.critical(
+                    f" SPOOL FULL ({self.total_bytes / 1e6:.1f} MB). "
+                    f"Batch of {len(events)} events NOT spooled ({self.dropped_batches} dropped so far)."
+                )
+                return False
+
+            if self._file is None:
+                self._open_segment()
+
+            self._file.write(record)
+            self._active_size += len(record)
+            self.total_bytes += len(record)
+            self._unsynced += 1
+
+            if self._active_size >= self.segment_bytes:
+                self._seal()
+            elif self._unsynced >= self.fsync_every:
+                self._sync()
+        return True
+
+    def sync_if_due(self):
+        """Called periodically by the drainer so a quiet feed is still fsync'ed within T seconds."""
+        with self._lock:
+            if self._unsynced and time.monotonic() - self._last_sync >= self.fsync_seconds:
+                self._sync()
+
+    def seal_if_aged(self) -> bool:
+        """
+        Closes the active segment once it is `max_age` seconds old, so a quiet feed still reaches Bronze.
+        Busy feeds fill segments first: sealing on every drainer tick would defeat batched fsyncs.
+        Returns True if one was sealed.
+        """
+        with self._lock:
+            if self._file is None or self._active_size == 0:
+                return False
+            if time.monotonic() - self._opened_at < self.max_age:
+                return False
+            self._seal()
+            return True
+
+    # --- Drain side ---
+    def sealed_segments(self) -> List[Path]:
+        return sorted(self.directory.glob(f"*{SEALED_SUFFIX}"))
+
+    def delete_segments(self, paths: List[Path]):
+        """Removes segments whose events are committed in Postgres."""
+        with self._lock:
+            for path in paths:
+                size = path.stat().st_size
+                path.unlink()
+                self.total_bytes -= size
+
+    def backlog(self) -> Dict[str, Any]:
+        """Backlog gauge: what is on disk and not yet in Postgres."""
+        with self._lock:
+            return {
+                "segments": len(self.sealed_segments()) + (1 if self._active_size else 0),
+                "bytes": self.total_bytes,
+                "dropped_batches": self.dropped_batches,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._seal()
+
+    # --- Internals (caller holds the lock) ---
+    def _open_segment(self):
+        self._active_path = self.directory / f"{self._next_seq:012d}{OPEN_SUFFIX}"
+        self._next_seq += 1
+        self._file = open(self._active_path, "ab")
+        self._active_size = 0
+        self._opened_at = time.monotonic()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _seal(self):
+        self._sync()
+        self._file.close()
+        self._active_path.rename(self._active_path.with_suffix(SEALED_SUFFIX))
+        self._file = None
+        self._active_path = None
+        self._active_size = 0
+
+# ============================================================
+# 3. DRAINER (Spool -> Bronze, in the background)
+# ============================================================
+class SpoolDrainer(threading.Thread):
+    """
+    Replays sealed segments into bronze.raw_events in large bulk batches.
+    A segment is deleted only after its events are committed.
+    On DB errors it backs off (up to 60s) and retries the same segments - polling is never blocked.
+    """
+
+    def __init__(self, spool: Spool, batch_events: int = Config.SPOOL_DRAIN_BATCH):
+        super().__init__(name="spool-drainer", daemon=True)
+        self.spool = spool
+        self.batch_events = batch_events
+        self._stop_event = threading.Event()
+        self.drained_events = 0
+
+    def stop(self, timeout: float = 30):
+        self._stop_event.set()
+        self.join(timeout)
+
+    def run(self):
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            self.spool.sync_if_due()
+
+            segments = self.spool.sealed_segments()
+            if not segments:
+                # Nothing sealed: hand over the active segment once it is old enough, else wait a moment
+                if not self.spool.seal_if_aged():
+                    self._stop_event.wait(1)
+                continue
+
+            try:
+                self.drain_once(segments)
+                backoff = 1.0
+            except psycopg2.OperationalError as e:
+                logger.error(f" Drain failed (DB unreachable): {e}. Retrying in {int(backoff)}s.")
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+            except Exception as e:
+                logger.error(f" Drain failed: {e}. Retrying in {int(backoff)}s.")
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def drain_once(self, segments: List[Path]):
+        """Loads as many whole segments as fit in one bulk batch, then deletes them."""
+        batch, consumed = [], []
+        for path in segments:
+            for events in read_segment(path):
+                batch.extend(events)
+            consumed.append(path)
+            if len(batch) >= self.batch_events:
+                break
+
+        if batch:
+            report = bulk_load_to_bronze(batch)
+            self.drained_events += report["inserted"]
+
+        self.spool.delete_segments(consumed)
+        logger.info(f" Drained {len(consumed)} segment(s) / {len(batch)} events.")
+
+# --- TEST BLOCK ---
+# Run directly: python ingestion/src/spool.py  (no database needed)
+if __name__ == "__main__":
+    import tempfile
+
+    print("--- STARTING TEST ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = Spool(Path(tmp), segment_bytes=2_000, max_bytes=20_000, compress=True, fsync_every=4)
+        sample = [{"id": str(i), "type": "PushEvent", "payload": {"ref": "refs/heads/main"}} for i in range(20)]
+
+        for _ in range(50):
+            spool.append(sample)
+        spool.close()
+        print(f"Backlog: {spool.backlog()}")
+
+        # A young segment stays open (and keeps batching fsyncs) until it is full or aged
+        quiet = Spool(Path(tmp) / "quiet", max_age=0.2)
+        quiet.append(sample)
+        sealed_young = quiet.seal_if_aged()
+        time.sleep(0.25)
+        print(f"Quiet segment sealed: young={sealed_young} aged={quiet.seal_if_aged()}")
+        quiet.close()
+
+        # Simulate a crash that tore the last record
+        last = spool.sealed_segments()[-1]
+        with open(last, "r+b") as f:
+            f.truncate(last.stat().st_size - 3)
+
+        replayed = sum(len(b) for p in spool.sealed_segments() for b in read_segment(p))
+        print(f"Events replayable after torn tail: {replayed}")
+    print("--- END TEST ---")
@@ -0,0 +1,150 @@
+import sys
+import argparse
+import psycopg2
+from psycopg2 import extensions
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# --- PATH SETUP ---
+current_dir = Path(__file__).resolve().parent
+sys.path.append(str(current_dir))
+
+from config import Config
+from logger import get_logger
+
+logger = get_logger("TABLE_STATS")
+
+# Tables whose row counts are maintained in meta.table_stats
+TRACKED_TABLES: List[str] = [
+    "bronze.raw_events",
+    "bronze.dead_letter_queue",
+    "silver.events",
+    "gold.dim_actors",
+    "gold.dim_repos",
+    "gold.dim_event_types",
+    "gold.fact_events",
+    "gold.fact_push_events",
+    "gold.fact_pull_request_events",
+    "gold.fact_issue_events",
+    "gold.fact_release_events",
+    "gold.fact_watch_events",
+    "gold.fact_fork_events",
+    "gold.agg_distinct_sketches",
+]
+
+# Tables that also carry a watermark (table -> column)
+# gold.agg_distinct_sketches has one too, but it is only ever moved by hll.py (never recounted)
+WATERMARK_COLUMNS: Dict[str, str] = {
+    "gold.fact_events": "silver_processed_at",
+}
+
+ADD_ROW_COUNT = "SELECT meta.add_row_count(%s, %s, %s);"
+
+# ============================================================
+# 1. INCREMENTAL UPDATE (Call inside the load transaction)
+# ============================================================
+def add_row_count(cursor, table_name: str, delta: int, watermark: Optional[datetime] = None):
+    """
+    Adds this batch's inserted rows to the maintained count.
+    Run it right before the load's COMMIT: the stats row stays locked only until then,
+    and the count commits (or rolls back) together with the rows.
+    """
+    if delta or watermark:
+        cursor.execute(ADD_ROW_COUNT, (table_name, delta, watermark))
+
+# ============================================================
+# 2. FULL RECOUNT AUDIT (Explicit, expensive)
+# ============================================================
+def audit_table_stats(fix: bool = True) -> Dict[str, int]:
+    """
+    Recounts every tracked table and corrects drift.
+
+    The exact count and the maintained count are read from the same
+    REPEATABLE READ snapshot, so loads running during the audit are not lost:
+    only the drift (maintained - exact) is subtracted afterwards.
+
+    Returns:
+        Dict[str, int]: drift per table (0 = in sync).
+    """
+    drifts: Dict[str, int] = {}
+    watermarks: Dict[str, Optional[datetime]] = {}
+    conn = None
+    try:
+        conn = psycopg2.connect(**Config.get_db_auth())
+
+        # Step 1: Consistent snapshot of data + stats
+        conn.set_session(isolation_level=extensions.ISOLATION_LEVEL_REPEATABLE_READ, readonly=True)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT table_name, row_count FROM meta.table_stats;")
+            maintained = dict(cursor.fetchall())
+
+            for table_name in TRACKED_TABLES:
+                column = WATERMARK_COLUMNS.get(table_name)
+                # Table/column names come from the constants above, never from input
+                select_max = f"MAX({column})" if column else "NULL"
+                cursor.execute(f"SELECT COUNT(*), {select_max} FROM {table_name};")
+                exact, watermark = cursor.fetchone()
+
+                drifts[table_name] = maintained.get(table_name, 0) - exact
+                watermarks[table_name] = watermark
+                status = "OK" if drifts[table_name] == 0 else f"DRIFT {drifts[table_name]:+d}"
+                logger.info(f"   {table_name:<26} exact={exact:<12} maintained={maintained.get(table_name, 0):<12} {status}")
+        conn.commit()
+
+        if not fix:
+            return drifts
+
+        # Step 2: Correct relative to the current value (concurrent loads keep their increments)
+        conn.set_session(isolation_level=extensions.ISOLATION_LEVEL_READ_COMMITTED, readonly=False)
+        with conn.cursor() as cursor:
+            for table_name, drift in drifts.items():
+                cursor.execute("""
+                    INSERT INTO meta.table_stats (table_name, row_count, max_watermark, last_audit_at, last_audit_drift)
+                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP, %s)
+                    ON CONFLICT (table_name) DO UPDATE SET
+                        row_count = meta.table_stats.row_count - %s,
+                        max_watermark = GREATEST(meta.table_stats.max_watermark, EXCLUDED.max_watermark),
+                        last_audit_at = CURRENT_TIMESTAMP,
+                        last_audit_drift = EXCLUDED.last_audit_drift;
+                """, (table_name, -drift, watermarks[table_name], drift, drift))
+        conn.commit()
+        logger.info(" Audit complete. Drift corrected.")
+        return drifts
+
+    except Exception as e:
+        logger.error(f" Audit failed: {e}")
+        if conn:
+            conn.rollback()
+        raise e
+    finally:
+        if conn: conn.close()
+
+
+def show_table_stats():
+    """Prints the maintained counts + layer reconciliation (no table scans)."""
+    with psycopg2.connect(**Config.get_db_auth()) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT table_name, row_count, max_watermark, updated_at, last_audit_at FROM meta.table_stats ORDER BY table_name;")
+            for table_name, rows, watermark, updated_at, audited in cursor.fetchall():
+                print(f"{table_name:<26} {rows:>12}  updated={updated_at:%Y-%m-%d %H:%M:%S}  audited={audited}  watermark={watermark}")
+
+            cursor.execute("SELECT silver_backlog, silver_not_in_gold FROM meta.v_layer_reconciliation;")
+            row = cursor.fetchone()
+            if row:
+                print(f"Silver backlog: {row[0]} | Silver rows not in Gold: {row[1]}")
+    conn.close()
+
+# Run directly:
+#   python ingestion/src/table_stats.py            -> show maintained counts
+#   python ingestion/src/table_stats.py --audit    -> full recount + fix drift
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintained table statistics")
+    parser.add_argument("--audit", action="store_true", help="Full COUNT(*) recount of every tracked table")
+    parser.add_argument("--dry-run", action="store_true", help="With --audit: report drift without fixing it")
+    args = parser.parse_args()
+
+    if args.audit:
+        audit_table_stats(fix=not args.dry_run)
+    else:
+        show_table_stats()
@@ -37,6 +37,10 @@ def setup_database():
             "warehouse/gold/03_dim_repos.sql",
             "warehouse/gold/04_dim_event_types.sql",
             "warehouse/gold/05_fact_events.sql",
+            "warehouse/gold/06_fact_event_details.sql",
+            "warehouse/gold/07_distinct_sketches.sql",
+            "warehouse/gold/08_search_indexes.sql",
+            "warehouse/meta/ddl.sql",
         ]
 
     try:
@@ -0,0 +1,122 @@
+-- warehouse/gold/ddl/06_fact_event_details.sql
+
+-- ============================================================
+-- Satellite Facts: Typed Payload Fields per Event Type
+-- ============================================================
+-- One row per event of the given type, same event_id as gold.fact_events.
+-- The high-value payload fields are extracted once at load time, so analysis
+-- never has to dig through silver.events.payload (JSONB) row by row.
+-- date_id / repo_id / actor_id are copied from the fact row: most questions
+-- ("push sizes per repo last week") filter on them without a join.
+-- Loaded in the same transaction (and from the same watermark) as gold.fact_events.
+
+DROP TABLE IF EXISTS gold.fact_push_events CASCADE;
+DROP TABLE IF EXISTS gold.fact_pull_request_events CASCADE;
+DROP TABLE IF EXISTS gold.fact_issue_events CASCADE;
+DROP TABLE IF EXISTS gold.fact_release_events CASCADE;
+DROP TABLE IF EXISTS gold.fact_watch_events CASCADE;
+DROP TABLE IF EXISTS gold.fact_fork_events CASCADE;
+
+-- ============================================================
+-- 1. PushEvent
+-- ============================================================
+CREATE TABLE gold.fact_push_events (
+    event_id                VARCHAR(50) PRIMARY KEY REFERENCES gold.fact_events(event_id) ON DELETE CASCADE,
+    date_id                 INT NOT NULL REFERENCES gold.dim_date(date_id),
+    repo_id                 BIGINT NOT NULL REFERENCES gold.dim_repos(repo_id),
+    actor_id                BIGINT NOT NULL REFERENCES gold.dim_actors(actor_id),
+
+    ref                     TEXT,              -- e.g. 'refs/heads/main'
+    head_sha                TEXT,              -- Unbounded: payloads are not validated upstream
+    commit_count            INT,               -- payload.size, else length of payload.commits
+    distinct_commit_count   INT                -- payload.distinct_size (commits new to the repo)
+);
+
+CREATE INDEX idx_fact_push_events_date ON gold.fact_push_events (date_id);
+CREATE INDEX idx_fact_push_events_repo ON gold.fact_push_events (repo_id);
+CREATE INDEX idx_fact_push_events_ref  ON gold.fact_push_events (ref);
+
+-- ============================================================
+-- 2. PullRequestEvent
+-- ============================================================
+CREATE TABLE gold.fact_pull_request_events (
+    event_id                VARCHAR(50) PRIMARY KEY REFERENCES gold.fact_events(event_id) ON DELETE CASCADE,
+    date_id                 INT NOT NULL REFERENCES gold.dim_date(date_id),
+    repo_id                 BIGINT NOT NULL REFERENCES gold.dim_repos(repo_id),
+    actor_id                BIGINT NOT NULL REFERENCES gold.dim_actors(actor_id),
+
+    action                  TEXT,              -- opened / closed / reopened / ...
+    pr_number               INT,
+    is_merged               BOOLEAN            -- Only meaningful for action = 'closed'
+);
+
+CREATE INDEX idx_fact_pr_events_date   ON gold.fact_pull_request_events (date_id);
+CREATE INDEX idx_fact_pr_events_action ON gold.fact_pull_request_events (action);
+-- Speeds up: the history of one PR
+CREATE INDEX idx_fact_pr_events_number ON gold.fact_pull_request_events (repo_id, pr_number);
+
+-- ============================================================
+-- 3. IssuesEvent
+-- ============================================================
+CREATE TABLE gold.fact_issue_events (
+    event_id                VARCHAR(50) PRIMARY KEY REFERENCES gold.fact_events(event_id) ON DELETE CASCADE,
+    date_id                 INT NOT NULL REFERENCES gold.dim_date(date_id),
+    repo_id                 BIGINT NOT NULL REFERENCES gold.dim_repos(repo_id),
+    actor_id                BIGINT NOT NULL REFERENCES gold.dim_actors(actor_id),
+
+    action                  TEXT,              -- opened / closed / reopened / ...
+    issue_number            INT
+);
+
+CREATE INDEX idx_fact_issue_events_date   ON gold.fact_issue_events (date_id);
+CREATE INDEX idx_fact_issue_events_action ON gold.fact_issue_events (action);
+CREATE INDEX idx_fact_issue_events_number ON gold.fact_issue_events (repo_id, issue_number);
+
+-- ============================================================
+-- 4. ReleaseEvent
+-- ============================================================
+CREATE TABLE gold.fact_release_events (
+    event_id                VARCHAR(50) PRIMARY KEY REFERENCES gold.fact_events(event_id) ON DELETE CASCADE,
+    date_id                 INT NOT NULL REFERENCES gold.dim_date(date_id),
+    repo_id                 BIGINT NOT NULL REFERENCES gold.dim_repos(repo_id),
+    actor_id                BIGINT NOT NULL REFERENCES gold.dim_actors(actor_id),
+
+    action                  TEXT,              -- published / created / ...
+    tag_name                TEXT,
+    is_prerelease           BOOLEAN
+);
+
+CREATE INDEX idx_fact_release_events_date ON gold.fact_release_events (date_id);
+CREATE INDEX idx_fact_release_events_repo ON gold.fact_release_events (repo_id);
+CREATE INDEX idx_fact_release_events_tag  ON gold.fact_release_events (tag_name);
+
+-- ============================================================
+-- 5. WatchEvent (Stars)
+-- ============================================================
+CREATE TABLE gold.fact_watch_events (
+    event_id                VARCHAR(50) PRIMARY KEY REFERENCES gold.fact_events(event_id) ON DELETE CASCADE,
+    date_id                 INT NOT NULL REFERENCES gold.dim_date(date_id),
+    repo_id                 BIGINT NOT NULL REFERENCES gold.dim_repos(repo_id),
+    actor_id                BIGINT NOT NULL REFERENCES gold.dim_actors(actor_id),
+
+    action                  TEXT               -- Always 'started' today
+);
+
+CREATE INDEX idx_fact_watch_events_date ON gold.fact_watch_events (date_id);
+CREATE INDEX idx_fact_watch_events_repo ON gold.fact_watch_events (repo_id);
+
+-- ============================================================
+-- 6. ForkEvent
+-- ============================================================
+CREATE TABLE gold.fact_fork_events (
+    event_id                VARCHAR(50) PRIMARY KEY REFERENCES gold.fact_events(event_id) ON DELETE CASCADE,
+    date_id                 INT NOT NULL REFERENCES gold.dim_date(date_id),
+    repo_id                 BIGINT NOT NULL REFERENCES gold.dim_repos(repo_id),      -- The forked (source) repo
+    actor_id                BIGINT NOT NULL REFERENCES gold.dim_actors(actor_id),
+
+    forkee_repo_id          BIGINT,            -- The new fork (not in dim_repos until it has events)
+    forkee_full_name        TEXT
+);
+
+CREATE INDEX idx_fact_fork_events_date ON gold.fact_fork_events (date_id);
+CREATE INDEX idx_fact_fork_events_repo ON gold.fact_fork_events (repo_id);
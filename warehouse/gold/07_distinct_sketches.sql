@@ -0,0 +1,25 @@
+-- warehouse/gold/ddl/07_distinct_sketches.sql
+
+-- ============================================================
+-- Aggregate: HyperLogLog Sketches for Distinct Counts
+-- ============================================================
+-- One sketch per day x event type x metric ('actor' / 'repo').
+-- Sketches are unions, not counts: any set of rows (a week, a month, a category,
+-- several event types) is answered by merging sketches - never by re-reading facts.
+-- Built and merged in Python (ingestion/src/hll.py), updated after every Gold run.
+-- Error: ~0.81% standard error per estimate (precision 14 = 16384 registers).
+DROP TABLE IF EXISTS gold.agg_distinct_sketches CASCADE;
+
+CREATE TABLE gold.agg_distinct_sketches (
+    date_id             INT NOT NULL REFERENCES gold.dim_date(date_id),
+    event_type          VARCHAR(50) NOT NULL REFERENCES gold.dim_event_types(event_type),
+    metric              VARCHAR(10) NOT NULL CHECK (metric IN ('actor', 'repo')),
+
+    sketch              BYTEA NOT NULL,            -- [version][precision][zlib(registers)]
+    updated_at          TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (date_id, event_type, metric)
+);
+
+-- Speeds up: "all sketches of metric X in a date range" (the only read pattern)
+CREATE INDEX idx_agg_distinct_sketches_metric_date ON gold.agg_distinct_sketches (metric, date_id);
@@ -0,0 +1,35 @@
+-- warehouse/gold/ddl/08_search_indexes.sql
+
+-- ============================================================
+-- Search Indexes: Repo Names + Actor Logins
+-- ============================================================
+-- The plain B-tree indexes on repo_name / actor_login only help '=' and
+-- collation-free range scans. The search box needs (see ingestion/src/search.py):
+--   prefix     lower(col) LIKE 'foo%'     -> B-tree with text_pattern_ops
+--   substring  lower(col) LIKE '%foo%'    -> trigram GIN
+--   fuzzy      lower(col) % 'foo'         -> trigram GIN (similarity >= pg_trgm.similarity_threshold)
+-- Postgres maintains all of them on every Gold upsert: nothing to rebuild after a run.
+-- All searches are on lower(...), so the indexes are expression indexes on lower(...) too.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ============================================================
+-- 1. Repositories (name = 'owner/project', so owner search is a name prefix)
+-- ============================================================
+CREATE INDEX IF NOT EXISTS idx_dim_repos_name_prefix
+    ON gold.dim_repos (LOWER(repo_name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_dim_repos_project_prefix
+    ON gold.dim_repos (LOWER(repo_project) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_dim_repos_name_trgm
+    ON gold.dim_repos USING GIN (LOWER(repo_name) gin_trgm_ops);
+
+-- ============================================================
+-- 2. Actors
+-- ============================================================
+CREATE INDEX IF NOT EXISTS idx_dim_actors_login_prefix
+    ON gold.dim_actors (LOWER(actor_login) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_dim_actors_login_trgm
+    ON gold.dim_actors USING GIN (LOWER(actor_login) gin_trgm_ops);
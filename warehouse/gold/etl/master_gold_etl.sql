@@ -3,6 +3,9 @@
 -- Gold ETL: All-or-Nothing Transaction with Performance Timing
 -- Industrial Standard Pattern
 -- ============================================================
+-- "-- @step <name>" ... "-- @end" mark each load statement. Profiling mode
+-- (PROFILE_QUERIES=true, ingestion/src/process_gold.py) cuts the steps out of
+-- this file and runs them one by one: keep the markers around every INSERT.
 
 BEGIN;  -- ← Start transaction
 
@@ -19,6 +22,15 @@ DECLARE
     v_repos_count INTEGER;
     v_types_count INTEGER;
     v_events_count INTEGER;
+    v_actors_new INTEGER;          -- Inserted (not updated) rows -> meta.table_stats
+    v_repos_new INTEGER;
+    v_new_watermark TIMESTAMPTZ;
+    v_push_count INTEGER;          -- Satellite facts (typed payload fields)
+    v_pull_request_count INTEGER;
+    v_issue_count INTEGER;
+    v_release_count INTEGER;
+    v_watch_count INTEGER;
+    v_fork_count INTEGER;
 BEGIN
     -- Record overall start time
     v_total_start := CLOCK_TIMESTAMP();
@@ -40,6 +52,9 @@ BEGIN
     -- ========================================
     v_start_time := CLOCK_TIMESTAMP();
     
+    -- (xmax = 0) is TRUE for freshly inserted rows, FALSE for upserted ones
+    WITH upserted AS (
+    -- @step 01_dim_actors
     INSERT INTO gold.dim_actors (actor_id, actor_login, last_event_time)
     SELECT DISTINCT ON (actor_id)
         actor_id,
@@ -53,12 +68,16 @@ BEGIN
         actor_login = EXCLUDED.actor_login,
         last_event_time = EXCLUDED.last_event_time,
         updated_at = CURRENT_TIMESTAMP
-    WHERE dim_actors.last_event_time < EXCLUDED.last_event_time;
-    
-    GET DIAGNOSTICS v_actors_count = ROW_COUNT;
+    WHERE dim_actors.last_event_time < EXCLUDED.last_event_time
+    -- @end
+    RETURNING (xmax = 0) AS is_new
+    )
+    SELECT COUNT(*), COUNT(*) FILTER (WHERE is_new)
+    INTO v_actors_count, v_actors_new
+    FROM upserted;
     v_end_time := CLOCK_TIMESTAMP();
     
-    RAISE NOTICE '[1/4] dim_actors: % rows | Duration: % ms', 
+    RAISE NOTICE '[1/5] dim_actors: % rows | Duration: % ms', 
         v_actors_count,
         EXTRACT(MILLISECONDS FROM (v_end_time - v_start_time))::INTEGER;
     
@@ -67,6 +86,8 @@ BEGIN
     -- ========================================
     v_start_time := CLOCK_TIMESTAMP();
     
+    WITH upserted AS (
+    -- @step 02_dim_repos
     INSERT INTO gold.dim_repos (
         repo_id, repo_name, repo_owner, repo_project, org_id, org_login, last_event_time
     )
@@ -100,12 +121,16 @@ BEGIN
         org_login = EXCLUDED.org_login,
         last_event_time = EXCLUDED.last_event_time,
         updated_at = CURRENT_TIMESTAMP
-    WHERE dim_repos.last_event_time < EXCLUDED.last_event_time;  
-    
-    GET DIAGNOSTICS v_repos_count = ROW_COUNT;
+    WHERE dim_repos.last_event_time < EXCLUDED.last_event_time
+    -- @end
+    RETURNING (xmax = 0) AS is_new
+    )
+    SELECT COUNT(*), COUNT(*) FILTER (WHERE is_new)
+    INTO v_repos_count, v_repos_new
+    FROM upserted;
     v_end_time := CLOCK_TIMESTAMP();
     
-    RAISE NOTICE '[2/4] dim_repos: % rows | Duration: % ms',
+    RAISE NOTICE '[2/5] dim_repos: % rows | Duration: % ms',
         v_repos_count,
         EXTRACT(MILLISECONDS FROM (v_end_time - v_start_time))::INTEGER;
     
@@ -114,6 +139,7 @@ BEGIN
     -- ========================================
     v_start_time := CLOCK_TIMESTAMP();
     
+    -- @step 03_dim_event_types
     INSERT INTO gold.dim_event_types (
         event_type, event_category, event_label, is_core_metric, is_curated, discovered_at
     )
@@ -128,11 +154,12 @@ BEGIN
     WHERE event_type NOT IN (SELECT event_type FROM gold.dim_event_types)
       AND event_type != 'UnknownEvent'
     ON CONFLICT (event_type) DO NOTHING;
+    -- @end
     
     GET DIAGNOSTICS v_types_count = ROW_COUNT;
     v_end_time := CLOCK_TIMESTAMP();
     
-    RAISE NOTICE '[3/4] dim_event_types: % new types | Duration: % ms',
+    RAISE NOTICE '[3/5] dim_event_types: % new types | Duration: % ms',
         v_types_count,
         EXTRACT(MILLISECONDS FROM (v_end_time - v_start_time))::INTEGER;
     
@@ -141,6 +168,8 @@ BEGIN
     -- ========================================
     v_start_time := CLOCK_TIMESTAMP();
     
+    WITH inserted AS (
+    -- @step 04_fact_events
     INSERT INTO gold.fact_events (
         event_id, date_id, repo_id, actor_id, event_type,
         event_time, event_hour, is_public, silver_processed_at
@@ -157,34 +186,193 @@ BEGIN
         processed_at AS silver_processed_at
     FROM silver.v_events
     WHERE processed_at > v_watermark
-    ON CONFLICT (event_id) DO NOTHING;
-    
-    GET DIAGNOSTICS v_events_count = ROW_COUNT;
+    ON CONFLICT (event_id) DO NOTHING
+    -- @end
+    RETURNING silver_processed_at
+    )
+    SELECT COUNT(*), MAX(silver_processed_at)
+    INTO v_events_count, v_new_watermark
+    FROM inserted;
     v_end_time := CLOCK_TIMESTAMP();
     
-    RAISE NOTICE '[4/4] fact_events: % rows | Duration: % ms',
+    RAISE NOTICE '[4/5] fact_events: % rows | Duration: % ms',
         v_events_count,
         EXTRACT(MILLISECONDS FROM (v_end_time - v_start_time))::INTEGER;
     
     -- ========================================
-    -- Final Report
+    -- Load Satellite Facts (typed payload fields per event type)
+    -- ========================================
+    -- Same watermark as fact_events: the rows just inserted above are picked up
+    -- through idx_fact_events_watermark, and the FK to fact_events always holds.
+    v_start_time := CLOCK_TIMESTAMP();
+    
+    -- @step 05_fact_push_events
+    INSERT INTO gold.fact_push_events (
+        event_id, date_id, repo_id, actor_id, ref, head_sha, commit_count, distinct_commit_count
+    )
+    SELECT
+        f.event_id,
+        f.date_id,
+        f.repo_id,
+        f.actor_id,
+        s.payload->>'ref',
+        s.payload->>'head',
+        COALESCE(
+            CASE WHEN s.payload->>'size' ~ '^[0-9]+$' THEN (s.payload->>'size')::INT END,
+            CASE WHEN jsonb_typeof(s.payload->'commits') = 'array' THEN jsonb_array_length(s.payload->'commits') END
+        ),
+        CASE WHEN s.payload->>'distinct_size' ~ '^[0-9]+$' THEN (s.payload->>'distinct_size')::INT END
+    FROM gold.fact_events f
+    JOIN silver.events s ON s.event_id = f.event_id
+    WHERE f.silver_processed_at > v_watermark
+      AND f.event_type = 'PushEvent'
+    ON CONFLICT (event_id) DO NOTHING;
+    -- @end
+    GET DIAGNOSTICS v_push_count = ROW_COUNT;
+    PERFORM meta.add_row_count('gold.fact_push_events', v_push_count);
+
+    -- @step 06_fact_pull_request_events
+    INSERT INTO gold.fact_pull_request_events (
+        event_id, date_id, repo_id, actor_id, action, pr_number, is_merged
+    )
+    SELECT
+        f.event_id,
+        f.date_id,
+        f.repo_id,
+        f.actor_id,
+        s.payload->>'action',
+        COALESCE(
+            CASE WHEN s.payload->>'number' ~ '^[0-9]+$' THEN (s.payload->>'number')::INT END,
+            CASE WHEN s.payload->'pull_request'->>'number' ~ '^[0-9]+$' THEN (s.payload->'pull_request'->>'number')::INT END
+        ),
+        CASE WHEN s.payload->'pull_request'->>'merged' IN ('true', 'false') THEN (s.payload->'pull_request'->>'merged')::BOOLEAN END
+    FROM gold.fact_events f
+    JOIN silver.events s ON s.event_id = f.event_id
+    WHERE f.silver_processed_at > v_watermark
+      AND f.event_type = 'PullRequestEvent'
+    ON CONFLICT (event_id) DO NOTHING;
+    -- @end
+    GET DIAGNOSTICS v_pull_request_count = ROW_COUNT;
+    PERFORM meta.add_row_count('gold.fact_pull_request_events', v_pull_request_count);
+
+    -- @step 07_fact_issue_events
+    INSERT INTO gold.fact_issue_events (
+        event_id, date_id, repo_id, actor_id, action, issue_number
+    )
+    SELECT
+        f.event_id,
+        f.date_id,
+        f.repo_id,
+        f.actor_id,
+        s.payload->>'action',
+        CASE WHEN s.payload->'issue'->>'number' ~ '^[0-9]+$' THEN (s.payload->'issue'->>'number')::INT END
+    FROM gold.fact_events f
+    JOIN silver.events s ON s.event_id = f.event_id
+    WHERE f.silver_processed_at > v_watermark
+      AND f.event_type = 'IssuesEvent'
+    ON CONFLICT (event_id) DO NOTHING;
+    -- @end
+    GET DIAGNOSTICS v_issue_count = ROW_COUNT;
+    PERFORM meta.add_row_count('gold.fact_issue_events', v_issue_count);
+
+    -- @step 08_fact_release_events
+    INSERT INTO gold.fact_release_events (
+        event_id, date_id, repo_id, actor_id, action, tag_name, is_prerelease
+    )
+    SELECT
+        f.event_id,
+        f.date_id,
+        f.repo_id,
+        f.actor_id,
+        s.payload->>'action',
+        s.payload->'release'->>'tag_name',
+        CASE WHEN s.payload->'release'->>'prerelease' IN ('true', 'false') THEN (s.payload->'release'->>'prerelease')::BOOLEAN END
+    FROM gold.fact_events f
+    JOIN silver.events s ON s.event_id = f.event_id
+    WHERE f.silver_processed_at > v_watermark
+      AND f.event_type = 'ReleaseEvent'
+    ON CONFLICT (event_id) DO NOTHING;
+    -- @end
+    GET DIAGNOSTICS v_release_count = ROW_COUNT;
+    PERFORM meta.add_row_count('gold.fact_release_events', v_release_count);
+
+    -- @step 09_fact_watch_events
+    INSERT INTO gold.fact_watch_events (
+        event_id, date_id, repo_id, actor_id, action
+    )
+    SELECT
+        f.event_id,
+        f.date_id,
+        f.repo_id,
+        f.actor_id,
+        s.payload->>'action'
+    FROM gold.fact_events f
+    JOIN silver.events s ON s.event_id = f.event_id
+    WHERE f.silver_processed_at > v_watermark
+      AND f.event_type = 'WatchEvent'
+    ON CONFLICT (event_id) DO NOTHING;
+    -- @end
+    GET DIAGNOSTICS v_watch_count = ROW_COUNT;
+    PERFORM meta.add_row_count('gold.fact_watch_events', v_watch_count);
+
+    -- @step 10_fact_fork_events
+    INSERT INTO gold.fact_fork_events (
+        event_id, date_id, repo_id, actor_id, forkee_repo_id, forkee_full_name
+    )
+    SELECT
+        f.event_id,
+        f.date_id,
+        f.repo_id,
+        f.actor_id,
+        CASE WHEN s.payload->'forkee'->>'id' ~ '^[0-9]+$' THEN (s.payload->'forkee'->>'id')::BIGINT END,
+        s.payload->'forkee'->>'full_name'
+    FROM gold.fact_events f
+    JOIN silver.events s ON s.event_id = f.event_id
+    WHERE f.silver_processed_at > v_watermark
+      AND f.event_type = 'ForkEvent'
+    ON CONFLICT (event_id) DO NOTHING;
+    -- @end
+    GET DIAGNOSTICS v_fork_count = ROW_COUNT;
+    PERFORM meta.add_row_count('gold.fact_fork_events', v_fork_count);
+    v_end_time := CLOCK_TIMESTAMP();
+    
+    RAISE NOTICE '[5/5] event details: push % | pull_request % | issue % | release % | watch % | fork % | Duration: % ms',
+        v_push_count, v_pull_request_count, v_issue_count,
+        v_release_count, v_watch_count, v_fork_count,
+        EXTRACT(MILLISECONDS FROM (v_end_time - v_start_time))::INTEGER;
+    
+    -- ========================================
+    -- Maintained Table Stats (additive, same transaction)
+    -- ========================================
+    PERFORM meta.add_row_count('gold.dim_actors', v_actors_new);
+    PERFORM meta.add_row_count('gold.dim_repos', v_repos_new);
+    PERFORM meta.add_row_count('gold.dim_event_types', v_types_count);
+    PERFORM meta.add_row_count('gold.fact_events', v_events_count, v_new_watermark);
+    
+    -- ========================================
+    -- Final Report (primary-key lookups on meta.table_stats, no COUNT(*))
     -- ========================================
     RAISE NOTICE '';
     RAISE NOTICE '========================================';
     RAISE NOTICE 'ETL SUCCESS - Committing transaction';
     RAISE NOTICE '========================================';
     RAISE NOTICE 'Total Counts:';
-    RAISE NOTICE '  dim_actors:      % total rows', (SELECT COUNT(*) FROM gold.dim_actors);
-    RAISE NOTICE '  dim_repos:       % total rows', (SELECT COUNT(*) FROM gold.dim_repos);
-    RAISE NOTICE '  dim_event_types: % total rows', (SELECT COUNT(*) FROM gold.dim_event_types);
-    RAISE NOTICE '  fact_events:     % total rows', (SELECT COUNT(*) FROM gold.fact_events);
+    RAISE NOTICE '  dim_actors:      % total rows', (SELECT row_count FROM meta.table_stats WHERE table_name = 'gold.dim_actors');
+    RAISE NOTICE '  dim_repos:       % total rows', (SELECT row_count FROM meta.table_stats WHERE table_name = 'gold.dim_repos');
+    RAISE NOTICE '  dim_event_types: % total rows', (SELECT row_count FROM meta.table_stats WHERE table_name = 'gold.dim_event_types');
+    RAISE NOTICE '  fact_events:     % total rows', (SELECT row_count FROM meta.table_stats WHERE table_name = 'gold.fact_events');
+    RAISE NOTICE '  event details:   % rows in 6 satellite tables', (
+        SELECT SUM(row_count) FROM meta.table_stats
+        WHERE table_name IN ('gold.fact_push_events', 'gold.fact_pull_request_events', 'gold.fact_issue_events',
+                             'gold.fact_release_events', 'gold.fact_watch_events', 'gold.fact_fork_events')
+    );
     RAISE NOTICE '';
     RAISE NOTICE 'Batch Summary:';
     RAISE NOTICE '  Actors processed:  %', v_actors_count;
     RAISE NOTICE '  Repos processed:   %', v_repos_count;
     RAISE NOTICE '  Events processed:  %', v_events_count;
     RAISE NOTICE '';
-    RAISE NOTICE 'New watermark: %', (SELECT MAX(silver_processed_at) FROM gold.fact_events);
+    RAISE NOTICE 'New watermark: %', COALESCE(v_new_watermark, v_watermark);
     RAISE NOTICE 'Total duration: % ms', 
         EXTRACT(MILLISECONDS FROM (CLOCK_TIMESTAMP() - v_total_start))::INTEGER;
     RAISE NOTICE '========================================';
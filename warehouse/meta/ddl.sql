@@ -0,0 +1,136 @@
+-- ============================================================
+-- META LAYER DDL (Pipeline Observability)
+-- Description: Operational tables about the pipeline itself.
+-- NOTE: No DROP here - history must survive a re-run of setup_db.py
+-- ============================================================
+
+CREATE SCHEMA IF NOT EXISTS meta;
+
+-- ============================================================
+-- 1. Query Profiles (EXPLAIN ANALYZE history)
+-- ============================================================
+-- Filled only when PROFILE_QUERIES=true.
+-- One row per profiled statement: Gold steps + Silver fetch/insert.
+CREATE TABLE IF NOT EXISTS meta.query_profiles (
+    profile_id          BIGSERIAL PRIMARY KEY,
+    run_id              VARCHAR(32) NOT NULL,      -- Groups all steps of one ETL run
+    layer               VARCHAR(20) NOT NULL,      -- 'silver' / 'gold'
+    step_name           VARCHAR(100) NOT NULL,     -- e.g. '01_dim_actors'
+
+    -- Metrics (taken from the JSON plan)
+    rows_processed      BIGINT,                    -- Tuples Inserted (writes) / Actual Rows (reads)
+    duration_ms         NUMERIC(14, 3),            -- Execution Time
+    planning_ms         NUMERIC(14, 3),            -- Planning Time
+    shared_hit_blocks   BIGINT,
+    shared_read_blocks  BIGINT,
+
+    -- Plan
+    plan_signature      VARCHAR(32),               -- md5 of the node-type tree (detects planner flips)
+    plan                JSONB NOT NULL,
+
+    -- Regression Check
+    is_regression       BOOLEAN DEFAULT FALSE,
+    regression_reason   TEXT,
+
+    captured_at         TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Speeds up: "last N runs of this step" (regression check)
+CREATE INDEX IF NOT EXISTS idx_query_profiles_step
+    ON meta.query_profiles (layer, step_name, captured_at DESC);
+
+-- Speeds up: "show me everything that regressed"
+CREATE INDEX IF NOT EXISTS idx_query_profiles_regressions
+    ON meta.query_profiles (captured_at) WHERE is_regression = TRUE;
+
+COMMENT ON TABLE meta.query_profiles IS
+'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) history per ETL step - used to spot planner flips and slowdowns';
+
+-- ============================================================
+-- 2. Table Stats (maintained row counts)
+-- ============================================================
+-- Every load adds its own inserted-row count in the same transaction,
+-- so reports never need COUNT(*) on a growing table.
+-- Drift (crashes, manual deletes) is corrected by: python ingestion/src/table_stats.py --audit
+CREATE TABLE IF NOT EXISTS meta.table_stats (
+    table_name          VARCHAR(100) PRIMARY KEY,  -- e.g. 'gold.fact_events'
+    row_count           BIGINT NOT NULL DEFAULT 0,
+    max_watermark       TIMESTAMPTZ,               -- gold.fact_events: MAX(silver_processed_at)
+    updated_at          TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    last_audit_at       TIMESTAMPTZ,
+    last_audit_drift    BIGINT                     -- maintained - exact at the last audit
+);
+
+COMMENT ON TABLE meta.table_stats IS
+'Incrementally maintained row counts per table - replaces COUNT(*) in run reports';
+
+-- Additive update used by Bronze, Silver and Gold loads
+CREATE OR REPLACE FUNCTION meta.add_row_count(
+    p_table_name TEXT,
+    p_delta BIGINT,
+    p_watermark TIMESTAMPTZ DEFAULT NULL
+) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO meta.table_stats (table_name, row_count, max_watermark)
+    VALUES (p_table_name, p_delta, p_watermark)
+    ON CONFLICT (table_name) DO UPDATE SET
+        row_count = meta.table_stats.row_count + EXCLUDED.row_count,
+        max_watermark = GREATEST(meta.table_stats.max_watermark, EXCLUDED.max_watermark),
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Seed: setup_db.py has just (re)created the layers, so one exact count here is cheap
+INSERT INTO meta.table_stats (table_name, row_count, max_watermark, last_audit_at, last_audit_drift)
+SELECT 'bronze.raw_events', COUNT(*), NULL::TIMESTAMPTZ, CURRENT_TIMESTAMP, 0 FROM bronze.raw_events
+UNION ALL
+SELECT 'bronze.dead_letter_queue', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM bronze.dead_letter_queue
+UNION ALL
+SELECT 'silver.events', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM silver.events
+UNION ALL
+SELECT 'gold.dim_actors', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.dim_actors
+UNION ALL
+SELECT 'gold.dim_repos', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.dim_repos
+UNION ALL
+SELECT 'gold.dim_event_types', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.dim_event_types
+UNION ALL
+SELECT 'gold.fact_events', COUNT(*), MAX(silver_processed_at), CURRENT_TIMESTAMP, 0 FROM gold.fact_events
+UNION ALL
+SELECT 'gold.fact_push_events', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.fact_push_events
+UNION ALL
+SELECT 'gold.fact_pull_request_events', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.fact_pull_request_events
+UNION ALL
+SELECT 'gold.fact_issue_events', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.fact_issue_events
+UNION ALL
+SELECT 'gold.fact_release_events', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.fact_release_events
+UNION ALL
+SELECT 'gold.fact_watch_events', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.fact_watch_events
+UNION ALL
+SELECT 'gold.fact_fork_events', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.fact_fork_events
+UNION ALL
+-- max_watermark here = last fact folded into the sketches (hll.py)
+SELECT 'gold.agg_distinct_sketches', COUNT(*), NULL, CURRENT_TIMESTAMP, 0 FROM gold.agg_distinct_sketches
+ON CONFLICT (table_name) DO UPDATE SET
+    row_count = EXCLUDED.row_count,
+    max_watermark = EXCLUDED.max_watermark,
+    updated_at = CURRENT_TIMESTAMP,
+    last_audit_at = EXCLUDED.last_audit_at,
+    last_audit_drift = 0;
+
+-- ============================================================
+-- 3. Layer Reconciliation (from maintained counts - no scans)
+-- ============================================================
+CREATE OR REPLACE VIEW meta.v_layer_reconciliation AS
+SELECT
+    b.row_count                 AS bronze_rows,
+    s.row_count                 AS silver_rows,
+    f.row_count                 AS gold_fact_rows,
+    b.row_count - s.row_count   AS silver_backlog,       -- Bronze rows not yet in Silver
+    s.row_count - f.row_count   AS silver_not_in_gold,   -- Gold backlog + rows with NULL event_time
+    f.max_watermark             AS gold_watermark
+FROM meta.table_stats b
+CROSS JOIN meta.table_stats s
+CROSS JOIN meta.table_stats f
+WHERE b.table_name = 'bronze.raw_events'
+  AND s.table_name = 'silver.events'
+  AND f.table_name = 'gold.fact_events';